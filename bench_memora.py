@@ -0,0 +1,245 @@
+"""Benchmarks for the Memora Lite data core; prints one JSON document so runs can be compared.
+
+    python bench_memora.py --sizes 1000,100000 --backend csv --out bench.json
+
+Sizes are rows per category (1k, 100k and 1M are the usual points). Every run works in a
+fresh temporary directory and uses a fake TTS engine, so no display or speech driver is needed.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from memora_core import (CATEGORY_FIELDS, MemoraCore, SpeechWorker, FakeTtsEngine, RecordingPlayer,
+                         SpeechCache)
+
+WORDS = ('milk', 'doctor', 'call', 'meeting', 'birthday', 'garden', 'pay', 'rent', 'walk', 'dog',
+         'lunch', 'project', 'dentist', 'flight', 'train', 'happy', 'tired', 'calm', 'coffee', 'book',
+         'school', 'laundry', 'gym', 'friend', 'car', 'bank', 'email', 'report', 'plants', 'music')
+MOODS = ('happy', 'calm', 'tired', 'anxious', 'grateful', 'sad', 'excited')
+# (label, term): a frequent word, a rarer one that needs the index, and a miss
+SEARCH_TERMS = (('common', 'call'), ('rare', 'zq-7'), ('missing', 'no such entry'))
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def generate_rows(category, count, seed=0):
+    """Yield `count` plausible rows for `category`, oldest first, deterministic for a given seed."""
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    for i in range(count):
+        when = start + timedelta(minutes=7 * i)
+        stamp = when.strftime('%Y-%m-%d %H:%M')
+        # roughly one row in a thousand carries the rare search term
+        rare = ' zq-7' if rng.random() < 0.001 else ''
+        if category == 'reminders':
+            yield [when.strftime('%Y-%m-%d'), when.strftime('%H:%M'), _text(rng, 3) + rare]
+        elif category == 'notes':
+            yield [stamp, _text(rng, 3), _text(rng, rng.randint(8, 40)) + rare]
+        elif category == 'contacts':
+            yield [_text(rng, 2).title() + rare, '+1 555 %07d' % rng.randrange(10 ** 7)]
+        else:
+            yield [stamp, rng.choice(MOODS), _text(rng, rng.randint(5, 30)) + rare]
+
+
+def _timed(fn, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples, result
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    return {
+        'median_ms': round(statistics.median(ordered), 3),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def _max_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return rss // 1024 if sys.platform == 'darwin' else rss
+
+
+def bench_category(directory, backend, category, size, repeat, search='index'):
+    result = {'rows': size}
+
+    core = MemoraCore(directory, storage_kind=backend, fsync='idle', search=search)
+    start = time.perf_counter()
+    for row in generate_rows(category, size):
+        core.save(category, row)
+    core.close()
+    elapsed = time.perf_counter() - start
+    result['append'] = {'seconds': round(elapsed, 3), 'rows_per_sec': round(size / elapsed) if elapsed else None}
+
+    # startup: open the existing data and show the first page, as the app does
+    start = time.perf_counter()
+    core = MemoraCore(directory, storage_kind=backend, search=search)
+    rows, older, _ = core.recent(category, count=5)
+    result['open_and_first_page_ms'] = round((time.perf_counter() - start) * 1000, 3)
+
+    samples, _ = _timed(lambda: core.recent(category, count=5), repeat)
+    result['recent'] = _summary(samples)
+
+    def page_back():
+        cursor = older
+        for _ in range(10):
+            if cursor is None:
+                break
+            _, cursor, _ = core.recent(category, count=5, before=cursor)
+    samples, _ = _timed(page_back, max(1, repeat // 5))
+    result['older_10_pages'] = _summary(samples)
+
+    searches = {}
+    for label, term in SEARCH_TERMS:
+        cold, refs = _timed(lambda: core.search(category, term), 1)
+        warm, refs = _timed(lambda: core.search(category, term), repeat)
+        fetch, _ = _timed(lambda: core.fetch(category, refs[:100]), repeat)
+        searches[label] = {'term': term, 'hits': len(refs), 'cold_ms': round(cold[0], 3),
+                           'warm': _summary(warm), 'fetch_first_100': _summary(fetch)}
+    result['search'] = searches
+
+    # live search works from an in-memory cache; measure its build cost and footprint
+    tracemalloc.start()
+    start = time.perf_counter()
+    cache = core.record_cache(category)
+    build_ms = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    samples, _ = _timed(lambda: [cache.filter(t[:n]) for t in ('call', 'doctor') for n in range(1, len(t) + 1)],
+                        max(1, repeat // 5))
+    result['record_cache'] = {'build_ms': round(build_ms, 3), 'peak_bytes': peak,
+                              'typing_sequence': _summary(samples)}
+    core.close()
+    return result
+
+
+def bench_speech(count=200):
+    """Latency from SpeechWorker.say() until the engine receives the text, plus hover coalescing."""
+    engine = FakeTtsEngine()
+    worker = SpeechWorker(lambda: engine)
+    while worker.ready_at is None:
+        time.sleep(0.001)
+    latencies = []
+    for i in range(count):
+        before = len(engine.spoken)
+        queued = time.perf_counter()
+        worker.say(f'item {i}', kind='feedback')
+        while len(engine.spoken) == before:
+            time.sleep(0)
+        latencies.append((engine.spoken[-1][0] - queued) * 1000)
+
+    # a burst of hovers behind a slow utterance should collapse to the newest one
+    engine.seconds_per_char = 0.002
+    engine.spoken = []
+    worker.say('x' * 50, kind='alert')
+    for i in range(100):
+        worker.say(f'hover {i}', kind='hover')
+    deadline = time.time() + 5
+    while len(engine.spoken) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    worker.stop()
+    return {'utterances': count, 'say_to_engine': _summary(latencies),
+            'hover_burst': {'queued': 100, 'spoken': len(engine.spoken) - 1}}
+
+
+def bench_speech_cache(phrases=20, seconds_per_char=0.0005):
+    """Time to speak repeated phrases live (synthesis) and again from the audio cache."""
+    directory = tempfile.mkdtemp(prefix='memora-bench-speech-')
+    engine = FakeTtsEngine(seconds_per_char)
+    player = RecordingPlayer()
+    worker = SpeechWorker(lambda: engine, cache=SpeechCache(directory), player=player)
+    texts = [f'Option {i}: Save Entry, View Recent, and Search.' for i in range(phrases)]
+
+    def speak_all(kind):
+        # say() until the utterance has finished, live or played back
+        samples = []
+        for text in texts:
+            before = len(engine.finished) + len(player.played)
+            started = time.perf_counter()
+            worker.say(text, kind=kind)
+            while len(engine.finished) + len(player.played) == before:
+                time.sleep(0.0005)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+
+    try:
+        # kind=None is never cached, so nothing is rendered behind the live run
+        live = speak_all(None)
+        worker.prewarm(texts)
+        deadline = time.time() + 10
+        while len(engine.rendered) < phrases and time.time() < deadline:
+            time.sleep(0.01)
+        cached = speak_all('page')
+        return {'phrases': phrases, 'live': _summary(live), 'cached': _summary(cached),
+                'rendered': len(engine.rendered), 'played_from_cache': len(player.played)}
+    finally:
+        worker.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,100000',
+                        help='comma-separated rows per category (e.g. 1000,100000,1000000)')
+    parser.add_argument('--backend', default='csv', choices=('csv', 'sqlite', 'segmented'))
+    parser.add_argument('--search', default='index', choices=('index', 'scan'), help='CSV search engine')
+    parser.add_argument('--categories', default=','.join(CATEGORY_FIELDS))
+    parser.add_argument('--repeat', type=int, default=20, help='samples per latency measurement')
+    parser.add_argument('--out', help='write the JSON here instead of stdout')
+    parser.add_argument('--keep', action='store_true', help='keep the generated data directories')
+    args = parser.parse_args(argv)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'search': args.search,
+        'results': {},
+    }
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        runs = {}
+        for category in [c.strip() for c in args.categories.split(',') if c.strip()]:
+            directory = tempfile.mkdtemp(prefix='memora-bench-')
+            try:
+                runs[category] = bench_category(directory, args.backend, category, size, args.repeat, args.search)
+            finally:
+                if not args.keep:
+                    shutil.rmtree(directory, ignore_errors=True)
+        report['results'][str(size)] = runs
+    report['speech'] = bench_speech()
+    report['speech_cache'] = bench_speech_cache()
+    report['max_rss_kb'] = _max_rss_kb()
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,3568 @@
+"""Headless data core for Memora Lite: storage backends, search index, speech queue and validation.
+
+Nothing here imports tkinter, so the same code runs under the app, the command line and the benchmarks.
+"""
+import os
+import io
+import re
+import sys
+import json
+import locale
+import wave
+import hashlib
+import subprocess
+import gzip
+import lzma
+import shutil
+import mmap
+import time
+import bisect
+import sqlite3
+import heapq
+import itertools
+from array import array
+import threading
+import functools
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque, OrderedDict
+import csv
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:
+    # no advisory locks (Windows): appends are still single writes per batch
+    fcntl = None
+
+# Category files are written and read as UTF-8 so byte offsets stay stable across platforms
+CSV_ENCODING = 'utf-8'
+# Older versions wrote them in the locale's encoding (cp1252 on most Windows installs)
+LEGACY_ENCODING = locale.getpreferredencoding(False)
+
+# Column layout of each category, in the order rows are stored and displayed
+CATEGORY_FIELDS = {
+    'reminders': ['date', 'due_time', 'title'],
+    'notes': ['created', 'title', 'content'],
+    'contacts': ['name', 'phone'],
+    'journal': ['created', 'mood', 'notes'],
+}
+
+
+def row_stamp(category, row):
+    """The 'YYYY-MM-DD HH:MM' a row belongs to; '' for contacts and rows without one."""
+    try:
+        if category == 'reminders':
+            return f'{row[0]} {row[1]}'
+        if category in ('notes', 'journal'):
+            return row[0]
+    except IndexError:
+        pass
+    return ''
+
+
+class JobCancelled(Exception):
+    """Raised inside a background job once a newer job with the same key has replaced it."""
+
+
+def check_cancelled(cancelled):
+    if cancelled is not None and cancelled():
+        raise JobCancelled()
+
+
+class CsvTailReader:
+    """Read whole CSV records around a byte offset without parsing the rest of the file.
+
+    A newline ends a record only when the number of quote characters between it and a
+    known record boundary is even, so quoted multi-line fields are never split.
+    `opener` may be gzip.open or lzma.open; compressed files are meant for iter_records,
+    as every backward seek restarts the decompression.
+    """
+
+    def __init__(self, path, block_size=8192, opener=open):
+        self.path = path
+        self.block_size = block_size
+        self.opener = opener
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def page_before(self, end=None, count=5):
+        """Return (rows, start, end) for the last `count` records ending at byte `end` (EOF by default)."""
+        with self.opener(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if end is None or end > size:
+                end = size
+            start = self._find_start(f, end, count)
+            f.seek(start)
+            data = f.read(end - start)
+        return self._parse(data), start, end
+
+    def page_after(self, start, count=5):
+        """Return (rows, start, end) for the next `count` records starting at byte `start`."""
+        with self.opener(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            start = min(start, size)
+            end = self._find_end(f, start, count, size)
+            f.seek(start)
+            data = f.read(end - start)
+        return self._parse(data), start, end
+
+    def _find_start(self, f, end, count):
+        # walk backwards block by block; `end` is a record boundary so quote parity starts at zero
+        found = 0
+        quotes = 0
+        hi = end
+        while hi > 0:
+            lo = max(0, hi - self.block_size)
+            f.seek(lo)
+            block = f.read(hi - lo)
+            pos = len(block)
+            while True:
+                nl = block.rfind(b'\n', 0, pos)
+                if nl < 0:
+                    quotes += block.count(b'"', 0, pos)
+                    break
+                quotes += block.count(b'"', nl + 1, pos)
+                pos = nl
+                # the terminator of the last record is not the start of a new one
+                if quotes % 2 == 0 and lo + nl + 1 < end:
+                    found += 1
+                    if found == count:
+                        return lo + nl + 1
+            hi = lo
+        return 0
+
+    def _find_end(self, f, start, count, size):
+        found = 0
+        quotes = 0
+        lo = start
+        f.seek(start)
+        while lo < size:
+            block = f.read(self.block_size)
+            if not block:
+                break
+            pos = 0
+            while True:
+                nl = block.find(b'\n', pos)
+                if nl < 0:
+                    quotes += block.count(b'"', pos)
+                    break
+                quotes += block.count(b'"', pos, nl)
+                pos = nl + 1
+                if quotes % 2 == 0:
+                    found += 1
+                    if found == count:
+                        return lo + nl + 1
+            lo += len(block)
+        return size
+
+    def read_at(self, offsets):
+        """Return the row of the record starting at each byte offset."""
+        rows = []
+        with self.opener(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            for offset in offsets:
+                end = self._find_end(f, offset, 1, size)
+                f.seek(offset)
+                parsed = self._parse(f.read(end - offset))
+                rows.append(parsed[0] if parsed else [])
+        return rows
+
+    def iter_records(self, start=0, stop=None):
+        """Yield (offset, length, row) for every complete record from byte `start` to `stop` (or EOF)."""
+        with self.opener(self.path, 'rb') as f:
+            f.seek(start)
+            offset = start
+            pending = b''
+            quotes = 0
+            left = None if stop is None else stop - start
+            while True:
+                if left is not None and left <= 0:
+                    break
+                block = f.read(self.block_size if left is None else min(self.block_size, left))
+                if left is not None:
+                    left -= len(block)
+                if not block:
+                    break
+                pos = 0
+                while True:
+                    nl = block.find(b'\n', pos)
+                    if nl < 0:
+                        quotes += block.count(b'"', pos)
+                        pending += block[pos:]
+                        break
+                    quotes += block.count(b'"', pos, nl)
+                    pending += block[pos:nl + 1]
+                    pos = nl + 1
+                    if quotes % 2 == 0:
+                        rows = self._parse(pending)
+                        if rows:
+                            yield offset, len(pending), rows[0]
+                        offset += len(pending)
+                        pending = b''
+                        quotes = 0
+            # a trailing record without its newline is still in the middle of being written
+
+    def _parse(self, data):
+        text = data.decode(CSV_ENCODING, errors='replace')
+        return [row for row in csv.reader(io.StringIO(text, newline='')) if row]
+
+
+def file_signatures(path, size, count):
+    """The first and last `count` bytes of the first `size` bytes of a file, to detect rewrites."""
+    with open(path, 'rb') as f:
+        head = f.read(min(size, count))
+        tail_start = max(0, size - count)
+        f.seek(tail_start)
+        tail = f.read(size - tail_start)
+    return head, tail
+
+
+def write_sidecar(path, meta, arrays=()):
+    """Atomically write `meta` as a JSON line followed by the raw contents of (name, array) pairs.
+
+    Sidecars live in a folder other instances share, so they hold plain data only: loading
+    one never runs code, unlike a pickle.
+    """
+    header = dict(meta, byteorder=sys.byteorder,
+                  arrays=[[name, values.typecode, len(values)] for name, values in arrays])
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n')
+        for _, values in arrays:
+            values.tofile(f)
+    os.replace(tmp, path)
+
+
+def read_sidecar(path):
+    """Return (meta, {name: array}) from write_sidecar; raises OSError or ValueError on a bad file."""
+    with open(path, 'rb') as f:
+        meta = json.loads(f.readline())
+        arrays = {}
+        for name, typecode, count in meta.pop('arrays'):
+            values = array(typecode)
+            try:
+                values.fromfile(f, count)
+            except EOFError:
+                raise ValueError(f'{path}: truncated')
+            if meta['byteorder'] != sys.byteorder:
+                values.byteswap()
+            arrays[name] = values
+    return meta, arrays
+
+
+class TrigramIndex:
+    """Persistent trigram index over one category CSV for case-insensitive substring search.
+
+    Every cell is lower-cased and padded with two NULs, so terms shorter than three
+    characters are answered by a prefix lookup over the sorted trigram keys. The CSV
+    itself acts as the change log: the snapshot records how many bytes it covers and
+    only newly appended records are indexed when the file grows.
+    """
+
+    VERSION = 2
+    SIG_BYTES = 64
+    SAVE_EVERY = 1000
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.index_path = csv_path + '.idx'
+        self.reader = CsvTailReader(csv_path, block_size=1 << 16)
+        self.lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.offsets = array('Q')      # row id -> byte offset of the record
+        self.postings = {}             # trigram -> array of row ids
+        self.indexed_size = 0
+        self.head_sig = b''
+        self.tail_sig = b''
+        self._keys = None
+        self._unsaved = 0
+
+    def _load(self):
+        try:
+            meta, arrays = read_sidecar(self.index_path)
+            if meta.get('version') != self.VERSION:
+                return
+            # postings are stored back to back, in the order of `grams`
+            ids, postings, pos = arrays['ids'], {}, 0
+            for gram, length in zip(meta['grams'], arrays['lengths']):
+                postings[gram] = ids[pos:pos + length]
+                pos += length
+            self.offsets, self.postings = arrays['offsets'], postings
+            self.indexed_size = meta['indexed_size']
+            self.head_sig = bytes.fromhex(meta['head_sig'])
+            self.tail_sig = bytes.fromhex(meta['tail_sig'])
+        except Exception:
+            self._reset()
+
+    def save(self):
+        """Write the snapshot atomically next to the CSV."""
+        with self.lock:
+            grams = list(self.postings)
+            ids = array('I')
+            for gram in grams:
+                ids.extend(self.postings[gram])
+            meta = {'version': self.VERSION, 'grams': grams, 'indexed_size': self.indexed_size,
+                    'head_sig': self.head_sig.hex(), 'tail_sig': self.tail_sig.hex()}
+            write_sidecar(self.index_path, meta, [
+                ('offsets', self.offsets), ('lengths', array('I', map(len, (self.postings[g] for g in grams)))),
+                ('ids', ids)])
+            self._unsaved = 0
+
+    def _signatures(self, size):
+        return file_signatures(self.csv_path, size, self.SIG_BYTES)
+
+    def refresh(self):
+        """Bring the index up to date with the CSV, rebuilding it if the file was rewritten."""
+        with self.lock:
+            try:
+                size = os.path.getsize(self.csv_path)
+            except OSError:
+                self._reset()
+                return
+            if size == self.indexed_size and self.indexed_size:
+                return
+            if size < self.indexed_size or self._signatures(self.indexed_size) != (self.head_sig, self.tail_sig):
+                # the file was truncated or edited outside the app
+                self._reset()
+            added = self._index_from(self.indexed_size)
+            if added and (self._unsaved >= self.SAVE_EVERY or added == len(self.offsets)):
+                try:
+                    self.save()
+                except Exception:
+                    pass
+
+    def _index_from(self, start):
+        added = 0
+        end = start
+        for offset, length, row in self.reader.iter_records(start):
+            end = offset + length
+            row_id = len(self.offsets)
+            self.offsets.append(offset)
+            for gram in self._row_grams(row):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array('I')
+                    self._keys = None
+                posting.append(row_id)
+            added += 1
+        self.indexed_size = end
+        self.head_sig, self.tail_sig = self._signatures(end) if end else (b'', b'')
+        self._unsaved += added
+        return added
+
+    @staticmethod
+    def _row_grams(row):
+        grams = set()
+        for cell in row:
+            text = str(cell).lower() + '\0\0'
+            for i in range(len(text) - 2):
+                grams.add(text[i:i + 3])
+        return grams
+
+    def _candidates(self, term):
+        if len(term) >= 3:
+            lists = []
+            for i in range(len(term) - 2):
+                posting = self.postings.get(term[i:i + 3])
+                if not posting:
+                    return []
+                lists.append(posting)
+            lists.sort(key=len)
+            candidates = set(lists[0])
+            # only intersect with lists of similar size; verification handles the rest cheaply
+            for posting in lists[1:]:
+                if len(posting) > 8 * len(candidates):
+                    break
+                candidates.intersection_update(posting)
+            return sorted(candidates)
+        if self._keys is None:
+            self._keys = sorted(self.postings)
+        candidates = set()
+        i = bisect.bisect_left(self._keys, term)
+        while i < len(self._keys) and self._keys[i].startswith(term):
+            candidates.update(self.postings[self._keys[i]])
+            i += 1
+        return sorted(candidates)
+
+    def _verified(self, needle, cancelled):
+        # (offset, row) for each candidate that really contains the term; caller holds the lock
+        self.refresh()
+        ids = self._candidates(needle)
+        if not ids:
+            return
+        with open(self.csv_path, 'rb') as f:
+            for n, row_id in enumerate(ids):
+                if n % 1024 == 0:
+                    check_cancelled(cancelled)
+                start = self.offsets[row_id]
+                end = self.offsets[row_id + 1] if row_id + 1 < len(self.offsets) else self.indexed_size
+                f.seek(start)
+                rows = self.reader._parse(f.read(end - start))
+                if rows and any(needle in str(cell).lower() for cell in rows[0]):
+                    yield start, rows[0]
+
+    def search(self, term, cancelled=None):
+        """Return matching rows in file order, the same rows a full case-insensitive scan would find."""
+        needle = term.lower()
+        if not needle:
+            return []
+        with self.lock:
+            return [row for _, row in self._verified(needle, cancelled)]
+
+    def search_offsets(self, term, cancelled=None):
+        """Like search, but return only the byte offsets of the matching records."""
+        needle = term.lower()
+        if not needle:
+            return array('Q')
+        with self.lock:
+            return array('Q', (offset for offset, _ in self._verified(needle, cancelled)))
+
+
+def _match_positions(data, key, start, stop, size):
+    """Offsets in [start, stop) where `key` occurs, at most one per line."""
+    positions = []
+    limit = min(stop + len(key) - 1, size)
+    pos = data.find(key, start, limit)
+    while pos != -1:
+        positions.append(pos)
+        # later hits on the same line belong to the same record
+        nl = data.find(b'\n', pos + len(key), size)
+        if nl == -1:
+            break
+        pos = data.find(key, nl + 1, limit)
+    return positions
+
+
+def _scan_shadow_range(shadow_path, key, start, stop, size):
+    # runs in a worker process for parallel scans
+    with open(shadow_path, 'rb') as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+        return _match_positions(data, key, start, stop, size)
+
+
+class MappedScan:
+    """Index-free substring search over one category CSV through a memory-mapped shadow copy.
+
+    `<csv>.lower` holds the CSV with ASCII letters lower-cased, which keeps every byte
+    offset the same, so a `find` in the shadow points straight into the CSV. The shadow
+    is extended with whatever was appended to the CSV since the last search and rebuilt
+    if the CSV was rewritten; other instances may have it mapped, so it only grows in
+    place and a rebuild is swapped in as a new file. `<csv>.ckpt` lists a record
+    boundary roughly every SPACING bytes; a hit is mapped to its record by walking
+    forward from the nearest boundary, and only the records that contain hits are parsed.
+    """
+
+    VERSION = 2
+    SPACING = 1 << 16
+    READ = 1 << 22
+    SIG_BYTES = 64
+    # below this size a parallel scan costs more in process start-up than it saves
+    PARALLEL_MIN = 64 << 20
+
+    def __init__(self, csv_path, workers=1):
+        self.csv_path = csv_path
+        self.shadow_path = csv_path + '.lower'
+        self.ckpt_path = csv_path + '.ckpt'
+        self.workers = workers
+        self.lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.checkpoints = array('Q', [0])
+        self.covered = 0               # CSV bytes mirrored in the shadow (always a record boundary)
+        self.head_sig = b''
+        self.tail_sig = b''
+
+    def _load(self):
+        try:
+            meta, arrays = read_sidecar(self.ckpt_path)
+            if meta.get('version') != self.VERSION or os.path.getsize(self.shadow_path) < meta['covered']:
+                return
+            self.checkpoints = arrays['checkpoints']
+            self.covered = meta['covered']
+            self.head_sig = bytes.fromhex(meta['head_sig'])
+            self.tail_sig = bytes.fromhex(meta['tail_sig'])
+        except Exception:
+            self._reset()
+
+    def _save(self):
+        meta = {'version': self.VERSION, 'covered': self.covered,
+                'head_sig': self.head_sig.hex(), 'tail_sig': self.tail_sig.hex()}
+        write_sidecar(self.ckpt_path, meta, [('checkpoints', self.checkpoints)])
+
+    def refresh(self):
+        """Mirror bytes appended to the CSV into the shadow, rebuilding it if the CSV was rewritten."""
+        with self.lock, file_lock(self.shadow_path):
+            try:
+                size = os.path.getsize(self.csv_path)
+            except OSError:
+                self._reset()
+                return
+            if size == self.covered:
+                return
+            try:
+                shadow_size = os.path.getsize(self.shadow_path)
+            except OSError:
+                shadow_size = 0
+            if size < self.covered or shadow_size < self.covered or file_signatures(
+                    self.csv_path, self.covered, self.SIG_BYTES) != (self.head_sig, self.tail_sig):
+                # rewritten CSV, or a shadow another instance rebuilt for a different one
+                self._reset()
+            if self._extend(size):
+                self.head_sig, self.tail_sig = file_signatures(self.csv_path, self.covered, self.SIG_BYTES)
+                try:
+                    self._save()
+                except OSError:
+                    pass
+
+    def _extend(self, size):
+        start = pos = self.covered
+        boundary = start
+        odd = 0                        # quote parity since `start`, itself a boundary
+        last = self.checkpoints[-1]
+        # never truncate: another instance may have the shadow mapped, and reading past a cut kills it with
+        # SIGBUS. Appends overwrite identical bytes at most; a rebuild is written aside and swapped in.
+        target = f'{self.shadow_path}.{os.getpid()}.tmp' if start == 0 else self.shadow_path
+        with open(self.csv_path, 'rb') as src, open(target, 'wb' if start == 0 else 'r+b') as dst:
+            src.seek(start)
+            dst.seek(start)
+            while pos < size:
+                block = src.read(min(self.READ, size - pos))
+                if not block:
+                    break
+                dst.write(block.lower())
+                i = 0
+                while True:
+                    nl = block.find(b'\n', i)
+                    if nl == -1:
+                        odd ^= block.count(b'"', i) & 1
+                        break
+                    odd ^= block.count(b'"', i, nl) & 1
+                    i = nl + 1
+                    if odd:
+                        continue
+                    boundary = pos + i
+                    if boundary - last >= self.SPACING and boundary < size:
+                        self.checkpoints.append(boundary)
+                        last = boundary
+                    # no boundary is needed until the next checkpoint is due
+                    skip = last + self.SPACING - pos
+                    if skip > i:
+                        if skip >= len(block):
+                            odd ^= block.count(b'"', i) & 1
+                            break
+                        odd ^= block.count(b'"', i, skip) & 1
+                        i = skip
+                pos += len(block)
+        if target != self.shadow_path:
+            os.replace(target, self.shadow_path)
+        # a record still being written by another process is picked up next time
+        end = pos if not odd and pos > start and self._ends_with_newline(pos) else boundary
+        if end < pos:
+            while self.checkpoints[-1] >= end and len(self.checkpoints) > 1:
+                self.checkpoints.pop()
+        changed = end != self.covered
+        self.covered = end
+        return changed
+
+    def _ends_with_newline(self, size):
+        with open(self.csv_path, 'rb') as f:
+            f.seek(size - 1)
+            return f.read(1) == b'\n'
+
+    @staticmethod
+    def _key(needle):
+        """Bytes to look for in the shadow, or None when every record has to be checked."""
+        if needle.isascii():
+            key = needle.encode('ascii')
+        elif needle.lower() == needle.upper():
+            # no cased letters, so the bytes are the same in the shadow
+            key = needle.encode('utf-8')
+        else:
+            # non-ASCII letters keep their case in the shadow; narrow by the longest ASCII run
+            runs = re.findall('[\x00-\x7f]+', needle)
+            if not runs:
+                return None
+            key = max(runs, key=len).encode('ascii')
+        # csv doubles quotes inside fields
+        return key.replace(b'"', b'""')
+
+    def search_offsets(self, term, cancelled=None):
+        """Return the byte offsets of records with a cell containing `term` (case-insensitive)."""
+        needle = term.lower()
+        refs = array('Q')
+        if not needle:
+            return refs
+        with self.lock:
+            with file_lock(self.shadow_path):
+                self.refresh()
+                size = self.covered
+                if not size:
+                    return refs
+                # opened before another instance can swap in a rebuild; this file only grows from now on
+                sf = open(self.shadow_path, 'rb')
+            key = self._key(needle)
+            with sf, open(self.csv_path, 'rb') as cf:
+                if os.fstat(cf.fileno()).st_size < size:
+                    # the CSV was rewritten since the refresh
+                    return self.search_offsets(term, cancelled)
+                with mmap.mmap(sf.fileno(), size, access=mmap.ACCESS_READ) as shadow, \
+                        mmap.mmap(cf.fileno(), size, access=mmap.ACCESS_READ) as data:
+                    if key is None:
+                        spans = self._all_records(data, size, cancelled)
+                    else:
+                        positions = self._positions(shadow, key, size, cancelled)
+                        spans = self._record_spans(data, positions, size, cancelled)
+                    reader = CsvTailReader(self.csv_path)
+                    for n, (start, end) in enumerate(spans):
+                        if n % 4096 == 0:
+                            check_cancelled(cancelled)
+                        rows = reader._parse(data[start:end])
+                        if rows and any(needle in cell.lower() for cell in rows[0]):
+                            refs.append(start)
+        return refs
+
+    def _positions(self, shadow, key, size, cancelled):
+        if self.workers > 1 and size >= self.PARALLEL_MIN:
+            step = -(-size // self.workers)
+            # the workers open the shadow by name: no instance may swap in a rebuild meanwhile
+            with file_lock(self.shadow_path), ProcessPoolExecutor(self.workers) as pool:
+                futures = [pool.submit(_scan_shadow_range, self.shadow_path, key, start, min(start + step, size), size)
+                           for start in range(0, size, step)]
+                positions = []
+                for future in futures:
+                    check_cancelled(cancelled)
+                    positions.extend(future.result())
+            return positions
+        return _match_positions(shadow, key, 0, size, size)
+
+    def _record_spans(self, data, positions, size, cancelled):
+        """Map sorted hit offsets to the (start, end) of the records containing them, once each."""
+        spans = []
+        checkpoints = self.checkpoints
+        seg_start = seg_end = cursor = -1
+        buf = b''
+        for n, pos in enumerate(positions):
+            if n % 4096 == 0:
+                check_cancelled(cancelled)
+            if spans and pos < spans[-1][1]:
+                continue
+            if pos >= seg_end:
+                k = bisect.bisect_right(checkpoints, pos) - 1
+                seg_start = checkpoints[k]
+                seg_end = checkpoints[k + 1] if k + 1 < len(checkpoints) else size
+                buf = data[seg_start:seg_end]
+                cursor = 0
+            # walk whole records from the last known boundary until one ends past the hit
+            target = pos - seg_start
+            odd = 0
+            i = cursor
+            while True:
+                nl = buf.find(b'\n', i)
+                if nl == -1:
+                    # covered data always ends on a boundary; never loop past the segment
+                    spans.append((seg_start + cursor, seg_end))
+                    cursor = len(buf)
+                    break
+                odd ^= buf.count(b'"', i, nl) & 1
+                i = nl + 1
+                if odd:
+                    continue
+                if nl >= target:
+                    spans.append((seg_start + cursor, seg_start + i))
+                    cursor = i
+                    break
+                cursor = i
+        return spans
+
+    def _all_records(self, data, size, cancelled):
+        spans = []
+        start = i = 0
+        odd = 0
+        while i < size:
+            nl = data.find(b'\n', i, size)
+            if nl == -1:
+                break
+            odd ^= data[i:nl].count(b'"') & 1
+            i = nl + 1
+            if not odd:
+                spans.append((start, i))
+                start = i
+                if len(spans) % 4096 == 0:
+                    check_cancelled(cancelled)
+        return spans
+
+
+class FileLock:
+    """Exclusive advisory lock (fcntl.flock) on `<path>.lock`, shared by every instance using the directory.
+
+    The lock file is never replaced, so the lock still holds across a rewrite of the data
+    file. Re-entrant within a thread; without fcntl, or on a filesystem that refuses
+    locks, only the in-process lock is taken.
+    """
+
+    def __init__(self, path):
+        self.path = path + '.lock'
+        self._local = threading.RLock()
+        self._depth = 0
+        self._f = None
+
+    def __enter__(self):
+        self._local.acquire()
+        self._depth += 1
+        if self._depth == 1 and fcntl is not None:
+            try:
+                if self._f is None:
+                    self._f = open(self.path, 'a')
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+            except OSError:
+                pass
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0 and self._f is not None:
+            try:
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+            except OSError:
+                pass
+        self._local.release()
+
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(path):
+    """The process-wide FileLock for a data file (flock locks are per open file, so there must be one)."""
+    key = os.path.abspath(path)
+    with _file_locks_guard:
+        lock = _file_locks.get(key)
+        if lock is None:
+            lock = _file_locks[key] = FileLock(key)
+        return lock
+
+
+def _same_file(f, path):
+    try:
+        a, b = os.fstat(f.fileno()), os.stat(path)
+    except OSError:
+        return False
+    return (a.st_ino, a.st_dev) == (b.st_ino, b.st_dev)
+
+
+def _utf8_line(line):
+    for encoding in (CSV_ENCODING, LEGACY_ENCODING):
+        try:
+            return line.decode(encoding).encode(CSV_ENCODING)
+        except (UnicodeDecodeError, LookupError):
+            pass
+    # Latin-1 decodes any byte, so nothing is ever replaced
+    return line.decode('latin-1').encode(CSV_ENCODING)
+
+
+def convert_legacy_csv(path):
+    """Re-encode a category file written in the locale's encoding as UTF-8; True if it was converted.
+
+    Lines are converted one at a time, so UTF-8 rows appended since the upgrade are kept
+    as they are. `<path>.utf8` marks a file as checked, so each file is read only once.
+    Search sidecars and the commit marker describe the old bytes and are removed.
+    """
+    marker = path + '.utf8'
+    if os.path.exists(marker):
+        return False
+    with file_lock(path):
+        if os.path.exists(marker):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                legacy = any(_utf8_line(line) != line for line in f)
+        except FileNotFoundError:
+            legacy = False
+        if legacy:
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(path, 'rb') as src, open(tmp, 'wb') as dst:
+                for line in src:
+                    dst.write(_utf8_line(line))
+            os.replace(tmp, path)
+            for suffix in ('.idx', '.lower', '.ckpt', '.commit'):
+                try:
+                    os.remove(path + suffix)
+                except OSError:
+                    pass
+        open(marker, 'w').close()
+    return legacy
+
+
+class WriteBehindWriter:
+    """Appends CSV rows through long-lived file handles with group commit.
+
+    Rows arriving within `window_ms` of each other are joined into one write on a
+    background thread. fsync policies: 'always' (after every batch), 'interval'
+    (at most every `fsync_ms`) or 'idle' (once no rows arrived for `fsync_ms`).
+    After each fsync the synced size is recorded in `<file>.commit`; that size is a
+    known record boundary, so crash recovery only has to re-scan the bytes after it.
+
+    Every write holds the file's FileLock, so instances sharing a directory never
+    interleave records. Bytes another instance appended between our writes are noted,
+    and changes() hands them out so the caller can read just those.
+    """
+
+    FSYNC_POLICIES = ('always', 'interval', 'idle')
+
+    def __init__(self, window_ms=20, fsync='interval', fsync_ms=1000):
+        self.window = window_ms / 1000.0
+        self.fsync = fsync if fsync in self.FSYNC_POLICIES else 'interval'
+        self.fsync_interval = fsync_ms / 1000.0
+        self._files = {}               # path -> open binary append handle
+        self._sizes = {}               # path -> size after the last batch (a record boundary)
+        self._pending = {}             # path -> encoded rows waiting for the next batch
+        self._unsynced = set()
+        self._followed = set()         # paths whose foreign appends are tracked for changes()
+        self._foreign = {}             # path -> [(start, end)] appended by other processes
+        self._replaced = set()         # followed paths rewritten or truncated by another process
+        self._baselines = {}           # followed path -> size last seen before it had a handle
+        self._cond = threading.Condition()
+        self._io_lock = threading.RLock()
+        self._last_append = 0.0
+        self._last_sync = time.monotonic()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='memora-writer', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def encode(row):
+        buf = io.StringIO()
+        csv.writer(buf).writerow(row)
+        return buf.getvalue().encode(CSV_ENCODING)
+
+    def append(self, path, row):
+        """Queue one row; it reaches the file within the batching window."""
+        data = self.encode(row)
+        with self._cond:
+            if self._closed:
+                raise ValueError('writer is closed')
+            self._pending.setdefault(path, []).append(data)
+            self._last_append = time.monotonic()
+            self._cond.notify()
+
+    def write_many(self, path, rows):
+        """Write a large batch at once on the caller's thread, after any rows already queued."""
+        data = b''.join(self.encode(row) for row in rows)
+        with self._io_lock, file_lock(path):
+            self._write_pending(path)
+            f = self._open(path)
+            f.write(data)
+            f.flush()
+            self._sizes[path] += len(data)
+            self._unsynced.add(path)
+            if self.fsync == 'always':
+                self._sync()
+        with self._cond:
+            # let the writer thread schedule the fsync for this batch
+            self._last_append = time.monotonic()
+            self._cond.notify()
+
+    def flush(self, path=None, sync=False):
+        """Write pending rows now (for one file or all); readers call this before reading."""
+        with self._io_lock:
+            self._write_pending(path)
+            if sync or self.fsync == 'always':
+                self._sync()
+
+    @contextlib.contextmanager
+    def locked(self, path):
+        """Hold `path` against writers in every instance; rows queued meanwhile wait until the end."""
+        with self._io_lock, file_lock(path):
+            self._write_pending(path)
+            yield
+
+    def replace(self, path, source):
+        """Swap a rewritten file in for `path`; rows still queued for it go to the new file."""
+        with self._io_lock, file_lock(path):
+            self._sync()
+            f = self._files.pop(path, None)
+            self._sizes.pop(path, None)
+            self._foreign.pop(path, None)
+            if f is not None:
+                f.close()
+            try:
+                # the marker describes the old file
+                os.remove(path + '.commit')
+            except OSError:
+                pass
+            os.replace(source, path)
+            if path in self._followed:
+                # rows other instances append to the new file before it is next opened are theirs
+                self._baselines[path] = os.path.getsize(path)
+
+    def close(self):
+        """Flush and fsync everything, then close the files."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        with self._io_lock:
+            self._write_pending()
+            self._sync()
+            for f in self._files.values():
+                try:
+                    f.close()
+                except Exception:
+                    pass
+            self._files = {}
+
+    def changes(self, path):
+        """Byte ranges other processes appended to `path` since the last call, as [(start, end)].
+
+        The first call for a path only records where it ends. Returns None when the file
+        was replaced or truncated under us, so the caller has to reread all of it.
+        """
+        with self._io_lock, file_lock(path):
+            first = path not in self._followed
+            self._followed.add(path)
+            if path not in self._files and not os.path.exists(path):
+                self._baselines.setdefault(path, 0)
+                return []
+            self._write_pending(path)
+            self._open(path)
+            ranges = self._foreign.pop(path, [])
+            if path in self._replaced:
+                self._replaced.discard(path)
+                return [] if first else None
+            return [] if first else ranges
+
+    def recover(self, path):
+        """Discard a torn last record left behind by a crash; returns the number of bytes dropped."""
+        with file_lock(path):
+            return self._recover(path)
+
+    def _recover(self, path):
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return 0
+        if size == 0:
+            return 0
+        start = self._read_marker(path)
+        if start is None or start > size:
+            # no usable marker: a file that ends with a newline is taken as complete
+            with open(path, 'rb') as f:
+                f.seek(size - 1)
+                if f.read(1) == b'\n':
+                    return 0
+            start = 0
+        end = start
+        for offset, length, _ in CsvTailReader(path, block_size=1 << 16).iter_records(start):
+            end = offset + length
+        if end < size:
+            with open(path, 'r+b') as f:
+                f.truncate(end)
+        return size - end
+
+    def _read_marker(self, path):
+        try:
+            with open(path + '.commit', 'r', encoding='utf-8') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _open(self, path):
+        # called with the file lock held, so the size seen here is a record boundary
+        f = self._files.get(path)
+        if f is not None and not _same_file(f, path):
+            # another instance replaced the file (e.g. a duplicate clean-up): continue on the new one
+            f.close()
+            del self._files[path]
+            self._baselines[path] = None
+            f = None
+        if f is None:
+            self._recover(path)
+            f = self._files[path] = open(path, 'ab')
+            f.seek(0, os.SEEK_END)
+            size = self._sizes[path] = f.tell()
+            if path in self._baselines:
+                base = self._baselines.pop(path)
+                self._note_foreign(path, base, size)
+        else:
+            size = os.fstat(f.fileno()).st_size
+            if size != self._sizes[path]:
+                self._note_foreign(path, self._sizes[path], size)
+                self._sizes[path] = size
+        return f
+
+    def _note_foreign(self, path, start, end):
+        if path not in self._followed:
+            return
+        if start is None or end < start:
+            self._replaced.add(path)
+            self._foreign.pop(path, None)
+        elif end > start:
+            self._foreign.setdefault(path, []).append((start, end))
+
+    def _write_pending(self, path=None):
+        with self._cond:
+            if path is None:
+                batches, self._pending = self._pending, {}
+            else:
+                batches = {path: self._pending.pop(path)} if path in self._pending else {}
+        for target, chunks in batches.items():
+            with file_lock(target):
+                f = self._open(target)
+                data = b''.join(chunks)
+                f.write(data)
+                f.flush()
+                self._sizes[target] += len(data)
+            self._unsynced.add(target)
+
+    def _sync(self):
+        for path in list(self._unsynced):
+            f = self._files.get(path)
+            if f is None:
+                continue
+            try:
+                os.fsync(f.fileno())
+                with open(path + '.commit', 'w', encoding='utf-8') as marker:
+                    marker.write(str(self._sizes[path]))
+            except OSError:
+                pass
+        self._unsynced.clear()
+        self._last_sync = time.monotonic()
+
+    def _sync_delay(self):
+        # seconds until the next fsync is due, or None when nothing needs syncing
+        if not self._unsynced or self.fsync == 'always':
+            return None
+        anchor = self._last_sync if self.fsync == 'interval' else self._last_append
+        return max(0.0, anchor + self.fsync_interval - time.monotonic())
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending and not self._closed:
+                    self._cond.wait(self._sync_delay())
+                has_rows = bool(self._pending)
+                closed = self._closed
+            if has_rows and not closed:
+                # group commit: rows arriving within the window join this batch
+                time.sleep(self.window)
+            with self._io_lock:
+                self._write_pending()
+                delay = self._sync_delay()
+                if self.fsync == 'always' or (delay is not None and delay <= 0):
+                    self._sync()
+            if closed:
+                return
+
+
+class CsvBackend:
+    """Default storage: one CSV file per category, searched through a TrigramIndex.
+
+    Paging cursors are byte offsets into the category file. With a WriteBehindWriter
+    appends are batched in the background and flushed before any read. `search` picks
+    the engine: 'index' (TrigramIndex) or 'scan' (MappedScan, nothing to keep in memory);
+    the scan is also the fallback when an index cannot be used.
+    """
+
+    name = 'csv'
+    ranged = False
+    SEARCH_ENGINES = ('index', 'scan')
+
+    def __init__(self, directory='.', writer=None, search='index', scan_workers=1):
+        self.directory = directory
+        self.writer = writer
+        self.search_engine = search if search in self.SEARCH_ENGINES else 'index'
+        self.scan_workers = scan_workers
+        self._indexes = {}
+        self._scans = {}
+        self._lock = threading.Lock()
+        for key in CATEGORY_FIELDS:
+            convert_legacy_csv(self.path(key))
+        if writer is not None:
+            # drop records torn by a crash before anything reads the files
+            for key in CATEGORY_FIELDS:
+                try:
+                    writer.recover(self.path(key))
+                except Exception:
+                    pass
+
+    def path(self, category):
+        return os.path.join(self.directory, f"{category.lower()}.csv")
+
+    def append(self, category, row):
+        path = self.path(category)
+        if self.writer is not None:
+            # the search index catches up from the file on its next query
+            self.writer.append(path, row)
+            return
+        with file_lock(path), open(path, 'a', newline='', encoding=CSV_ENCODING) as f:
+            csv.writer(f).writerow(row)
+        # keep an already loaded search index current with the appended row
+        self._refresh_search(path)
+
+    def _refresh_search(self, path):
+        for engine in (self._indexes.get(path), self._scans.get(path)):
+            if engine is not None:
+                try:
+                    engine.refresh()
+                except Exception:
+                    pass
+
+    def append_many(self, category, rows):
+        """Append a batch of rows with a single write."""
+        path = self.path(category)
+        if self.writer is not None:
+            self.writer.write_many(path, rows)
+            return
+        with file_lock(path), open(path, 'a', newline='', encoding=CSV_ENCODING) as f:
+            csv.writer(f).writerows(rows)
+        self._refresh_search(path)
+
+    def _flush(self, path):
+        if self.writer is not None:
+            self.writer.flush(path)
+
+    def rewrite(self, category, rows):
+        """Replace all rows of a category (written to a temporary file, then swapped in)."""
+        path = self.path(category)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', newline='', encoding=CSV_ENCODING) as f:
+            csv.writer(f).writerows(rows)
+        if self.writer is not None:
+            self.writer.replace(path, tmp)
+        else:
+            with file_lock(path):
+                os.replace(tmp, path)
+        with self._lock:
+            # search engines notice the rewrite through their signatures; drop them anyway
+            self._indexes.pop(path, None)
+            self._scans.pop(path, None)
+
+    @contextlib.contextmanager
+    def exclusive(self, category):
+        """Keep every instance from appending to a category while it is read and rewritten."""
+        path = self.path(category)
+        if self.writer is not None:
+            with self.writer.locked(path):
+                yield
+        else:
+            with file_lock(path):
+                yield
+
+    def changes(self, category):
+        """Rows other instances appended since the last call; None when the file must be reread.
+
+        Only the appended byte ranges are parsed. Needs the write-behind writer, which
+        tells our own appends apart from everyone else's; without it nothing is reported.
+        """
+        if self.writer is None:
+            return []
+        path = self.path(category)
+        ranges = self.writer.changes(path)
+        if ranges is None:
+            with self._lock:
+                self._indexes.pop(path, None)
+                self._scans.pop(path, None)
+            return None
+        rows = []
+        reader = CsvTailReader(path, block_size=1 << 16)
+        for start, end in ranges:
+            rows.extend(row for _, _, row in reader.iter_records(start, end))
+        return rows
+
+    def version_token(self, category):
+        """A value that changes whenever the category's rows change."""
+        path = self.path(category)
+        self._flush(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return ('csv', st.st_size, st.st_mtime_ns)
+
+    def page_before(self, category, before=None, count=5):
+        """Return (rows, older, newer) for the `count` entries before cursor `before` (newest by default)."""
+        self._flush(self.path(category))
+        reader = CsvTailReader(self.path(category))
+        try:
+            rows, start, end = reader.page_before(end=before, count=count)
+        except FileNotFoundError:
+            return [], None, None
+        return rows, (start if start > 0 else None), (end if end < reader.size() else None)
+
+    def page_after(self, category, after, count=5):
+        """Return (rows, older, newer) for the `count` entries after cursor `after`."""
+        self._flush(self.path(category))
+        reader = CsvTailReader(self.path(category))
+        try:
+            rows, start, end = reader.page_after(after, count=count)
+        except FileNotFoundError:
+            return [], None, None
+        return rows, (start if start > 0 else None), (end if end < reader.size() else None)
+
+    def iter_rows(self, category):
+        """Yield every row of a category in file order."""
+        path = self.path(category)
+        self._flush(path)
+        try:
+            with open(path, 'r', newline='', encoding=CSV_ENCODING, errors='replace') as f:
+                for row in csv.reader(f):
+                    if row:
+                        yield row
+        except FileNotFoundError:
+            return
+
+    def search_refs(self, category, term, cancelled=None):
+        """Return the byte offsets of records containing `term`; `cancelled` is polled to stop early."""
+        path = self.path(category)
+        self._flush(path)
+        if not os.path.exists(path):
+            return array('Q')
+        if self.search_engine == 'index':
+            try:
+                with self._lock:
+                    index = self._indexes.get(path)
+                    if index is None:
+                        index = self._indexes[path] = TrigramIndex(path)
+                return index.search_offsets(term, cancelled)
+            except JobCancelled:
+                raise
+            except Exception:
+                # index unusable; fall back to scanning the file
+                pass
+        try:
+            with self._lock:
+                scan = self._scans.get(path)
+                if scan is None:
+                    scan = self._scans[path] = MappedScan(path, workers=self.scan_workers)
+            return scan.search_offsets(term, cancelled)
+        except JobCancelled:
+            raise
+        except Exception:
+            # no shadow copy either (e.g. a read-only folder); parse and test every record
+            pass
+        needle = term.lower()
+        refs = array('Q')
+        for n, (offset, _, row) in enumerate(CsvTailReader(path, block_size=1 << 16).iter_records()):
+            if n % 4096 == 0:
+                check_cancelled(cancelled)
+            if any(needle in str(cell).lower() for cell in row):
+                refs.append(offset)
+        return refs
+
+    def fetch(self, category, refs):
+        """Return the rows for refs produced by search_refs."""
+        if not len(refs):
+            return []
+        return CsvTailReader(self.path(category)).read_at(refs)
+
+    def search(self, category, term, cancelled=None):
+        """Return rows containing `term`."""
+        return self.fetch(category, self.search_refs(category, term, cancelled))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        for index in self._indexes.values():
+            try:
+                index.save()
+            except Exception:
+                pass
+
+
+class SqliteBackend:
+    """SQLite storage in WAL mode with one table per category and a shared FTS5 table.
+
+    The FTS table uses the trigram tokenizer so MATCH answers the same substring
+    queries as the CSV search; every candidate is still checked in Python so the
+    results stay identical. Existing CSV files are streamed in once on first start.
+    Paging cursors are row ids.
+    """
+
+    name = 'sqlite'
+    ranged = False
+    BATCH = 5000
+    # category field -> FTS column; dates and times share the `meta` column
+    FTS_COLUMNS = {
+        'reminders': {'title': 'title', 'date': 'meta', 'due_time': 'meta'},
+        'notes': {'title': 'title', 'content': 'notes', 'created': 'meta'},
+        'contacts': {'name': 'title', 'phone': 'notes'},
+        'journal': {'mood': 'mood', 'notes': 'notes', 'created': 'meta'},
+    }
+    TIMESTAMP_COLUMNS = {'reminders': 'date', 'notes': 'created', 'journal': 'created'}
+
+    def __init__(self, directory='.', filename='memora.db'):
+        self.directory = directory
+        self.db_path = os.path.join(directory, filename)
+        self.lock = threading.RLock()
+        self._following = {}           # key -> (max id seen, rewrite marker)
+        self._own = {}                 # followed key -> [(first id, last id)] inserted by this instance
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.fts = False
+        self._create_schema()
+        self._migrate_csv()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+            for key, fields in CATEGORY_FIELDS.items():
+                columns = ', '.join(f'{field} TEXT' for field in fields)
+                self.conn.execute(f'CREATE TABLE IF NOT EXISTS {key} (id INTEGER PRIMARY KEY, {columns})')
+                stamp = self.TIMESTAMP_COLUMNS.get(key)
+                if stamp:
+                    self.conn.execute(f'CREATE INDEX IF NOT EXISTS {key}_{stamp} ON {key} ({stamp})')
+        try:
+            with self.conn:
+                self.conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5("
+                                  "category UNINDEXED, ref UNINDEXED, title, notes, mood, meta, tokenize='trigram')")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 or without the trigram tokenizer; search scans instead
+            self.fts = False
+
+    def _migrate_csv(self):
+        if self._meta('csv_migrated'):
+            return
+        # one transaction with the marker: an interrupted import leaves nothing behind to import twice,
+        # and a second instance starting alongside waits here, then finds the marker set
+        with self._transaction():
+            if self._meta('csv_migrated'):
+                return
+            for key in CATEGORY_FIELDS:
+                path = os.path.join(self.directory, f'{key}.csv')
+                if not os.path.exists(path):
+                    continue
+                convert_legacy_csv(path)
+                batch = []
+                for _, _, row in CsvTailReader(path, block_size=1 << 16).iter_records():
+                    batch.append(row)
+                    if len(batch) >= self.BATCH:
+                        self._insert_many(key, batch)
+                        batch = []
+                if batch:
+                    self._insert_many(key, batch)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_migrated', ?)",
+                              (datetime.now().strftime('%Y-%m-%d %H:%M'),))
+
+    def _meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _fit(row, fields):
+        # older rows may be shorter (or longer) than the current layout
+        values = [str(v) for v in list(row)[:len(fields)]]
+        return values + [''] * (len(fields) - len(values))
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the database write lock up front; nested uses join the open transaction
+        with self.lock:
+            if self.conn.in_transaction:
+                yield
+                return
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+
+    @contextlib.contextmanager
+    def exclusive(self, category):
+        """Run a read and rewrite of a category as one transaction, so no instance inserts in between."""
+        with self._transaction():
+            yield
+
+    def _insert_many(self, key, rows):
+        fields = CATEGORY_FIELDS[key]
+        rows = [self._fit(row, fields) for row in rows]
+        # the write lock is held before reading MAX(id), so two instances never pick the same ids
+        with self._transaction():
+            next_id = (self.conn.execute(f'SELECT MAX(id) FROM {key}').fetchone()[0] or 0) + 1
+            numbered = [[next_id + i] + row for i, row in enumerate(rows)]
+            if key in self._following and rows:
+                self._own.setdefault(key, []).append((next_id, next_id + len(rows) - 1))
+            placeholders = ', '.join('?' * (len(fields) + 1))
+            self.conn.executemany(f"INSERT INTO {key} (id, {', '.join(fields)}) VALUES ({placeholders})", numbered)
+            if self.fts:
+                self.conn.executemany(
+                    'INSERT INTO entries_fts (category, ref, title, notes, mood, meta) VALUES (?, ?, ?, ?, ?, ?)',
+                    [self._fts_values(key, fields, row) for row in numbered])
+
+    def _fts_values(self, key, fields, numbered_row):
+        columns = {'title': [], 'notes': [], 'mood': [], 'meta': []}
+        for field, value in zip(fields, numbered_row[1:]):
+            columns[self.FTS_COLUMNS[key][field]].append(value)
+        return (key, numbered_row[0]) + tuple(' '.join(columns[c]) for c in ('title', 'notes', 'mood', 'meta'))
+
+    def append(self, category, row):
+        self._insert_many(category.lower(), [row])
+
+    def append_many(self, category, rows):
+        self._insert_many(category.lower(), rows)
+
+    def rewrite(self, category, rows):
+        """Replace all rows of a category in one transaction."""
+        key = category.lower()
+        with self._transaction():
+            self.conn.execute(f'DELETE FROM {key}')
+            if self.fts:
+                self.conn.execute('DELETE FROM entries_fts WHERE category = ?', (key,))
+            # tells other instances following this category to reload it
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                              (f'rewrite:{key}', str(time.time_ns())))
+            self._own.pop(key, None)
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.BATCH:
+                    self._insert_many(key, batch)
+                    batch = []
+            if batch:
+                self._insert_many(key, batch)
+            if key in self._following:
+                self._following[key] = self._follow_state(key)
+                self._own.pop(key, None)
+
+    def _follow_state(self, key):
+        top = self.conn.execute(f'SELECT MAX(id) FROM {key}').fetchone()[0] or 0
+        return top, self._meta(f'rewrite:{key}')
+
+    def changes(self, category):
+        """Rows other instances inserted since the last call; None when the category was rewritten."""
+        key = category.lower()
+        fields = CATEGORY_FIELDS[key]
+        with self.lock:
+            state = self._follow_state(key)
+            seen = self._following.get(key)
+            self._following[key] = state
+            own = self._own.pop(key, [])
+            if seen is None:
+                return []
+            if state[1] != seen[1] or state[0] < seen[0]:
+                return None
+            rows = self.conn.execute(f"SELECT id, {', '.join(fields)} FROM {key} WHERE id > ? AND id <= ? ORDER BY id",
+                                     (seen[0], state[0])).fetchall()
+        return [list(row[1:]) for row in rows if not any(first <= row[0] <= last for first, last in own)]
+
+    def version_token(self, category):
+        key = category.lower()
+        with self.lock:
+            return ('sqlite',) + tuple(self.conn.execute(f'SELECT COUNT(*), MAX(id) FROM {key}').fetchone())
+
+    def _select(self, key, where, params, order='ASC', limit=None):
+        fields = ', '.join(CATEGORY_FIELDS[key])
+        sql = f'SELECT id, {fields} FROM {key} WHERE {where} ORDER BY id {order}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _page(self, key, records):
+        if not records:
+            return [], None, None
+        first, last = records[0][0], records[-1][0]
+        with self.lock:
+            has_older = self.conn.execute(f'SELECT 1 FROM {key} WHERE id < ? LIMIT 1', (first,)).fetchone()
+            has_newer = self.conn.execute(f'SELECT 1 FROM {key} WHERE id > ? LIMIT 1', (last,)).fetchone()
+        rows = [list(r[1:]) for r in records]
+        return rows, (first if has_older else None), (last if has_newer else None)
+
+    def page_before(self, category, before=None, count=5):
+        key = category.lower()
+        if before is None:
+            records = self._select(key, '1', (), order='DESC', limit=count)
+        else:
+            records = self._select(key, 'id < ?', (before,), order='DESC', limit=count)
+        return self._page(key, records[::-1])
+
+    def page_after(self, category, after, count=5):
+        key = category.lower()
+        return self._page(key, self._select(key, 'id > ?', (after,), limit=count))
+
+    def iter_rows(self, category):
+        key = category.lower()
+        fields = ', '.join(CATEGORY_FIELDS[key])
+        with self.lock:
+            cursor = self.conn.execute(f'SELECT {fields} FROM {key} ORDER BY id')
+        while True:
+            # hold the lock per batch only, so saves are not blocked by a long read
+            with self.lock:
+                batch = cursor.fetchmany(self.BATCH)
+            if not batch:
+                return
+            for row in batch:
+                yield list(row)
+
+    def search_refs(self, category, term, cancelled=None):
+        """Return the ids of rows containing `term`, checked in Python for exact substring semantics."""
+        key = category.lower()
+        needle = term.lower()
+        refs = array('q')
+        if not needle:
+            return refs
+        fields = ', '.join(CATEGORY_FIELDS[key])
+        if self.fts and len(needle) >= 3:
+            phrase = '"' + term.replace('"', '""') + '"'
+            sql = (f'SELECT id, {fields} FROM {key} WHERE id IN '
+                   f'(SELECT ref FROM entries_fts WHERE entries_fts MATCH ? AND category = ?) ORDER BY id')
+            params = (phrase, key)
+        else:
+            # trigram MATCH needs at least three characters
+            sql = f'SELECT id, {fields} FROM {key} ORDER BY id'
+            params = ()
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+        while True:
+            check_cancelled(cancelled)
+            with self.lock:
+                batch = cursor.fetchmany(self.BATCH)
+            if not batch:
+                return refs
+            for r in batch:
+                if any(needle in str(cell).lower() for cell in r[1:]):
+                    refs.append(r[0])
+
+    def fetch(self, category, refs):
+        """Return the rows for ids produced by search_refs, in id order."""
+        key = category.lower()
+        rows = []
+        refs = list(refs)
+        for i in range(0, len(refs), 500):
+            chunk = refs[i:i + 500]
+            records = self._select(key, f"id IN ({', '.join('?' * len(chunk))})", tuple(chunk))
+            rows.extend(list(r[1:]) for r in records)
+        return rows
+
+    def search(self, category, term, cancelled=None):
+        return self.fetch(category, self.search_refs(category, term, cancelled))
+
+    def close(self):
+        try:
+            with self.lock:
+                self.conn.close()
+        except Exception:
+            pass
+
+
+class SegmentedBackend:
+    """One CSV per category and month (e.g. journal/2026-10.csv) plus a manifest per category.
+
+    The manifest records each segment's row count, time range and byte size, so recent
+    views, date ranges and 'last N days' searches open only the segments they need.
+    Contacts have no timestamp and live in a single 'all' segment. Old segments can be
+    compressed with gzip or lzma and are then read by streaming decompression. Refs and
+    paging cursors hold the segment's month number above a 40-bit byte offset.
+    """
+
+    name = 'segmented'
+    ranged = True
+    OFFSET_BITS = 40
+    MANIFEST = 'manifest.json'
+    COMPRESSORS = {'gz': gzip.open, 'xz': lzma.open}
+    SEGMENT_FILE = re.compile(r'^(\d{4}-\d{2}|all)\.csv(?:\.(gz|xz))?$')
+    BATCH = 5000
+
+    def __init__(self, directory='.'):
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._manifests = {}
+        self._scans = {}
+        self._following = set()
+        self._foreign = {}             # followed key -> rows other instances appended
+        self._inodes = {}              # segment path -> inode, to tell a rewritten file from a grown one
+        for key in CATEGORY_FIELDS:
+            self._manifest(key)
+
+    # --- segments and manifest ---
+
+    def _folder(self, key):
+        return os.path.join(self.directory, key)
+
+    def _path(self, key, segment):
+        return os.path.join(self._folder(key), segment['file'])
+
+    @staticmethod
+    def _number(name):
+        if name == 'all':
+            return 0
+        return int(name[:4]) * 12 + int(name[5:7])
+
+    @staticmethod
+    def _name(number):
+        if number == 0:
+            return 'all'
+        year, month = divmod(number - 1, 12)
+        return f'{year:04d}-{month + 1:02d}'
+
+    def _encode(self, name, offset):
+        return (self._number(name) << self.OFFSET_BITS) | offset
+
+    def _decode(self, ref):
+        return self._name(ref >> self.OFFSET_BITS), ref & ((1 << self.OFFSET_BITS) - 1)
+
+    def _segment_name(self, key, row):
+        if key == 'contacts':
+            return 'all'
+        stamp = row_stamp(key, row)
+        if re.match(r'\d{4}-(0[1-9]|1[0-2])', stamp):
+            return stamp[:7]
+        # no usable date: file it under the month it was saved in
+        return datetime.now().strftime('%Y-%m')
+
+    def _manifest(self, key):
+        with self._lock:
+            data = self._manifests.get(key)
+            if data is None:
+                data = self._manifests[key] = self._load_manifest(key)
+            return data
+
+    def _read_manifest(self, key):
+        # None when the manifest is missing or unreadable
+        try:
+            with open(os.path.join(self._folder(key), self.MANIFEST), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data['segments'].items()
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+        return data
+
+    def _load_manifest(self, key):
+        folder = self._folder(key)
+        os.makedirs(folder, exist_ok=True)
+        # one instance migrates; another starting alongside waits, then reads its manifest
+        with file_lock(os.path.join(folder, self.MANIFEST)):
+            data = self._read_manifest(key)
+            changed = data is None or not data.get('migrated')
+            if changed:
+                self._migrate_csv(key)
+                # a lost or torn manifest is rebuilt from the segment files by _reconcile
+                data = dict(data or {'version': 1, 'segments': {}}, migrated=True)
+            self._manifests[key] = data
+            if self._reconcile(key, data) or changed:
+                self._save_manifest(key)
+        return data
+
+    def _reconcile(self, key, data):
+        """Bring the manifest in line with the files, e.g. after a crash between a write and its manifest update."""
+        segments = data['segments']
+        found = {}
+        for filename in os.listdir(self._folder(key)):
+            match = self.SEGMENT_FILE.match(filename)
+            if match is None:
+                continue
+            name, compression = match.group(1), match.group(2)
+            if name in found and not compression:
+                # a compression was interrupted: the plain file is still authoritative
+                self._remove(os.path.join(self._folder(key), found[name]))
+            elif name in found:
+                self._remove(os.path.join(self._folder(key), filename))
+                continue
+            found[name] = filename
+        changed = False
+        for name in list(segments):
+            if name not in found:
+                del segments[name]
+                changed = True
+        for name, filename in found.items():
+            segment = segments.get(name)
+            path = os.path.join(self._folder(key), filename)
+            if segment is None or segment.get('file') != filename or segment.get('bytes') != os.path.getsize(path):
+                segments[name] = self._measure(key, filename)
+                changed = True
+        return changed
+
+    def _measure(self, key, filename):
+        match = self.SEGMENT_FILE.match(filename)
+        compression = match.group(2)
+        path = os.path.join(self._folder(key), filename)
+        segment = {'file': filename, 'rows': 0, 'first': '', 'last': '', 'bytes': os.path.getsize(path)}
+        raw = 0
+        for offset, length, row in self._reader(path, compression).iter_records():
+            self._count(key, segment, [row])
+            raw = offset + length
+        if compression:
+            segment['compression'] = compression
+            segment['raw_bytes'] = raw
+        return segment
+
+    @staticmethod
+    def _count(key, segment, rows):
+        stamps = [stamp for stamp in (row_stamp(key, row) for row in rows) if stamp]
+        segment['rows'] += len(rows)
+        if stamps:
+            first, last = min(stamps), max(stamps)
+            segment['first'] = min(segment['first'], first) if segment['first'] else first
+            segment['last'] = max(segment['last'], last)
+
+    def _save_manifest(self, key):
+        path = os.path.join(self._folder(key), self.MANIFEST)
+        # instances sharing the folder each write their own temporary file, one at a time
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with file_lock(path):
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._manifests[key], f, indent=1, sort_keys=True)
+            os.replace(tmp, path)
+
+    def _migrate_csv(self, key):
+        # split an existing single-file category into monthly segments, streaming. They are built in a
+        # staging folder that is marked complete before its files are moved in, and the flat file is
+        # then archived as <key>.csv.migrated, so it is never split again.
+        path = os.path.join(self.directory, f'{key}.csv')
+        staging = self._folder(key) + '.migrating'
+        complete = os.path.join(staging, '.complete')
+        if not os.path.exists(complete):
+            if not os.path.exists(path):
+                return
+            if any(self.SEGMENT_FILE.match(filename) for filename in os.listdir(self._folder(key))):
+                # migrated before (by an older version, or the manifest was lost): the segments are authoritative
+                os.replace(path, path + '.migrated')
+                return
+            convert_legacy_csv(path)
+            self._split_csv(key, path, staging)
+            open(complete, 'w').close()
+        for filename in os.listdir(staging):
+            if filename == '.complete':
+                continue
+            source, target = os.path.join(staging, filename), os.path.join(self._folder(key), filename)
+            if os.path.exists(target):
+                # moved in before a crash; a live segment is never overwritten
+                os.remove(source)
+            else:
+                os.replace(source, target)
+        shutil.rmtree(staging, ignore_errors=True)
+        if os.path.exists(path):
+            os.replace(path, path + '.migrated')
+
+    def _split_csv(self, key, path, staging):
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+
+        def flush(batch):
+            groups = {}
+            for row in batch:
+                groups.setdefault(self._segment_name(key, row), []).append(row)
+            for name, rows in groups.items():
+                with open(os.path.join(staging, f'{name}.csv'), 'a', newline='', encoding=CSV_ENCODING) as f:
+                    csv.writer(f).writerows(rows)
+
+        batch = []
+        for _, _, row in CsvTailReader(path, block_size=1 << 16).iter_records():
+            batch.append(row)
+            if len(batch) >= self.BATCH:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    @staticmethod
+    def _remove(path):
+        for p in (path, path + '.lower', path + '.ckpt'):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+    def _reader(self, path, compression=None):
+        return CsvTailReader(path, block_size=1 << 16, opener=self.COMPRESSORS.get(compression, open))
+
+    def _names(self, key, since=None, until=None):
+        """Segment names in time order, skipping those entirely outside [since, until)."""
+        names = []
+        for name, segment in sorted(self._manifest(key)['segments'].items()):
+            if since and segment['last'] and segment['last'] < since:
+                continue
+            if until and segment['first'] and segment['first'] >= until:
+                continue
+            names.append(name)
+        return names
+
+    def _size(self, key, name):
+        segment = self._manifest(key)['segments'][name]
+        return segment['raw_bytes'] if segment.get('compression') else segment['bytes']
+
+    # --- writing ---
+
+    def append(self, category, row):
+        self.append_many(category, [row])
+
+    def append_many(self, category, rows):
+        with self._lock:
+            self._write(category.lower(), rows)
+            self._save_manifest(category.lower())
+
+    def rewrite(self, category, rows):
+        """Replace all rows of a category."""
+        key = category.lower()
+        with self._lock:
+            segments = self._manifest(key)['segments']
+            # the old files stay until the new ones exist, so no new file can reuse an old inode
+            # (other instances tell a rewrite from an append by it)
+            old = []
+            for name, segment in list(segments.items()):
+                path = self._path(key, segment)
+                self._scans.pop(path, None)
+                self._inodes.pop(path, None)
+                try:
+                    os.replace(path, path + '.old')
+                    old.append(path + '.old')
+                except OSError:
+                    pass
+                self._remove(path)
+                del segments[name]
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= self.BATCH:
+                    self._write(key, batch)
+                    batch = []
+            if batch:
+                self._write(key, batch)
+            self._save_manifest(key)
+            for path in old:
+                self._remove(path)
+
+    @contextlib.contextmanager
+    def exclusive(self, category):
+        """Keep every instance from appending to a category's segments while it is read and rewritten."""
+        key = category.lower()
+        with self._lock, contextlib.ExitStack() as stack:
+            for segment in sorted(self._manifest(key)['segments'].values(), key=lambda seg: seg['file']):
+                stack.enter_context(file_lock(self._path(key, segment)))
+            yield
+
+    def version_token(self, category):
+        with self._lock:
+            segments = self._manifest(category.lower())['segments']
+            return ('segmented',) + tuple(sorted((name, seg['bytes']) for name, seg in segments.items()))
+
+    def _write(self, key, rows):
+        groups = {}
+        for row in rows:
+            row = [str(cell) for cell in row]
+            groups.setdefault(self._segment_name(key, row), []).append(row)
+        segments = self._manifest(key)['segments']
+        for name, batch in groups.items():
+            segment = segments.get(name)
+            if segment is not None and segment.get('compression'):
+                # a late row for an archived month: unpack it again
+                self._decompress(key, name)
+            segment = segments.setdefault(name, {'file': f'{name}.csv', 'rows': 0, 'first': '', 'last': '',
+                                                 'bytes': 0})
+            path = self._path(key, segment)
+            with file_lock(path):
+                # rows another instance appended since we last looked are counted first
+                self._absorb(key, segment)
+                with open(path, 'a', newline='', encoding=CSV_ENCODING) as f:
+                    csv.writer(f).writerows(batch)
+                self._count(key, segment, batch)
+                segment['bytes'] = os.path.getsize(path)
+                self._inodes[path] = os.stat(path).st_ino
+
+    def _absorb(self, key, segment):
+        # count the records past the manifest's byte size; False if the file shrank
+        path = self._path(key, segment)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        known = segment.get('bytes', 0)
+        inode = os.stat(path).st_ino if size else None
+        if size < known or (inode is not None and self._inodes.setdefault(path, inode) != inode):
+            return False
+        if size > known:
+            rows = []
+            end = known
+            for offset, length, row in self._reader(path).iter_records(known, size):
+                rows.append(row)
+                end = offset + length
+            self._count(key, segment, rows)
+            segment['bytes'] = end
+            if key in self._following:
+                self._foreign.setdefault(key, []).extend(rows)
+        return True
+
+    def changes(self, category):
+        """Rows other instances appended since the last call; None when segments were rewritten,
+        compressed or removed elsewhere (the manifest is then rebuilt from the files)."""
+        key = category.lower()
+        with self._lock:
+            manifest = self._manifest(key)
+            segments = manifest['segments']
+            first = key not in self._following
+            self._following.add(key)
+            found = {}
+            for filename in os.listdir(self._folder(key)):
+                match = self.SEGMENT_FILE.match(filename)
+                if match is not None:
+                    found[match.group(1)] = filename
+            consistent = set(segments) <= set(found)
+            before = {name: seg.get('bytes') for name, seg in segments.items()}
+            for name, filename in sorted(found.items()):
+                if not consistent:
+                    break
+                segment = segments.get(name)
+                if segment is None and filename.endswith('.csv'):
+                    # a month another instance started
+                    segment = segments[name] = {'file': filename, 'rows': 0, 'first': '', 'last': '', 'bytes': 0}
+                if segment is None or segment['file'] != filename:
+                    consistent = False
+                elif segment.get('compression'):
+                    consistent = segment['bytes'] == os.path.getsize(self._path(key, segment))
+                else:
+                    with file_lock(self._path(key, segment)):
+                        consistent = self._absorb(key, segment)
+            rows = self._foreign.pop(key, [])
+            if not consistent:
+                for segment in segments.values():
+                    self._scans.pop(self._path(key, segment), None)
+                    self._inodes.pop(self._path(key, segment), None)
+                self._reconcile(key, manifest)
+                self._save_manifest(key)
+                return [] if first else None
+            if before != {name: seg.get('bytes') for name, seg in segments.items()}:
+                self._save_manifest(key)
+            return [] if first else rows
+
+    # --- compression ---
+
+    def compress_segments(self, compression='gz', older_than_months=3, cancelled=None):
+        """Compress month segments older than the given number of months; returns how many."""
+        if compression not in self.COMPRESSORS:
+            return 0
+        today = datetime.now()
+        cutoff = self._name(self._number(today.strftime('%Y-%m')) - older_than_months)
+        done = 0
+        for key in CATEGORY_FIELDS:
+            for name in self._names(key):
+                check_cancelled(cancelled)
+                with self._lock:
+                    segment = self._manifest(key)['segments'].get(name)
+                    if name == 'all' or name >= cutoff or segment is None or segment.get('compression'):
+                        continue
+                    self._compress(key, name, compression)
+                    self._save_manifest(key)
+                    done += 1
+        return done
+
+    def _compress(self, key, name, compression):
+        segment = self._manifest(key)['segments'][name]
+        path = self._path(key, segment)
+        target = f'{path}.{compression}'
+        tmp = f'{target}.{os.getpid()}.tmp'
+        with open(path, 'rb') as src, self.COMPRESSORS[compression](tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(tmp, target)
+        segment.update({'file': os.path.basename(target), 'compression': compression,
+                        'raw_bytes': segment['bytes'], 'bytes': os.path.getsize(target)})
+        self._scans.pop(path, None)
+        self._remove(path)
+
+    def _decompress(self, key, name):
+        segment = self._manifest(key)['segments'][name]
+        path = self._path(key, segment)
+        target = os.path.join(self._folder(key), f'{name}.csv')
+        tmp = f'{target}.{os.getpid()}.tmp'
+        with self.COMPRESSORS[segment['compression']](path, 'rb') as src, open(tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        os.replace(tmp, target)
+        self._remove(path)
+        segment.update({'file': f'{name}.csv', 'bytes': os.path.getsize(target)})
+        segment.pop('compression', None)
+        segment.pop('raw_bytes', None)
+
+    # --- reading ---
+
+    def _records(self, key, name, start=0):
+        segment = self._manifest(key)['segments'][name]
+        return self._reader(self._path(key, segment), segment.get('compression')).iter_records(start)
+
+    def _segment_before(self, key, name, end, count):
+        # (rows, start, end) for up to `count` records ending at `end` (None: end of segment)
+        segment = self._manifest(key)['segments'][name]
+        if not segment.get('compression'):
+            return CsvTailReader(self._path(key, segment)).page_before(end=end, count=count)
+        tail = deque(maxlen=count)
+        for offset, length, row in self._records(key, name):
+            if end is not None and offset + length > end:
+                break
+            tail.append((offset, length, row))
+        if not tail:
+            return [], end or 0, end or 0
+        return [r[2] for r in tail], tail[0][0], tail[-1][0] + tail[-1][1]
+
+    def _segment_after(self, key, name, start, count):
+        segment = self._manifest(key)['segments'][name]
+        if not segment.get('compression'):
+            return CsvTailReader(self._path(key, segment)).page_after(start, count=count)
+        rows, end = [], start
+        for offset, length, row in self._records(key, name, start):
+            if len(rows) >= count:
+                break
+            rows.append(row)
+            end = offset + length
+        return rows, start, end
+
+    def page_before(self, category, before=None, count=5):
+        """Return (rows, older, newer) for the `count` entries before cursor `before` (newest by default)."""
+        key = category.lower()
+        with self._lock:
+            names = self._names(key)
+            if not names:
+                return [], None, None
+            if before is None:
+                i, end = len(names) - 1, None
+            else:
+                name, end = self._decode(before)
+                if name not in names:
+                    return [], None, None
+                i = names.index(name)
+            rows, newest, older = [], None, None
+            while i >= 0:
+                page, start, stop = self._segment_before(key, names[i], end, count - len(rows))
+                if newest is None:
+                    newest = (i, stop)
+                rows[:0] = page
+                if len(rows) >= count:
+                    older = self._encode(names[i], start) if start > 0 or i > 0 else None
+                    break
+                i, end = i - 1, None
+            last, stop = newest
+            newer = self._encode(names[last], stop) if stop < self._size(key, names[last]) or last < len(names) - 1 else None
+        return rows, older, newer
+
+    def page_after(self, category, after, count=5):
+        """Return (rows, older, newer) for the `count` entries after cursor `after`."""
+        key = category.lower()
+        with self._lock:
+            names = self._names(key)
+            name, start = self._decode(after)
+            if name not in names:
+                return [], None, None
+            i = names.index(name)
+            rows, oldest, newer = [], None, None
+            while i < len(names):
+                page, first, stop = self._segment_after(key, names[i], start, count - len(rows))
+                if oldest is None:
+                    oldest = (i, first)
+                rows.extend(page)
+                if len(rows) >= count:
+                    if stop < self._size(key, names[i]) or i < len(names) - 1:
+                        newer = self._encode(names[i], stop)
+                    break
+                i, start = i + 1, 0
+            first_i, first = oldest
+            older = self._encode(names[first_i], first) if first > 0 or first_i > 0 else None
+        return rows, older, newer
+
+    def iter_rows(self, category, since=None, until=None):
+        """Yield rows in time order; with since/until ('YYYY-MM-DD HH:MM' prefixes) only that range is read."""
+        key = category.lower()
+        with self._lock:
+            names = self._names(key, since, until)
+        for name in names:
+            for _, _, row in self._records(key, name):
+                if since or until:
+                    stamp = row_stamp(key, row)
+                    if (since and stamp < since) or (until and stamp >= until):
+                        continue
+                yield row
+
+    def search_refs(self, category, term, cancelled=None, since=None):
+        """Refs of records containing `term`, oldest first; `since` skips older segments and rows."""
+        key = category.lower()
+        needle = term.lower()
+        refs = array('Q')
+        if not needle:
+            return refs
+        with self._lock:
+            names = self._names(key, since)
+            segments = dict(self._manifest(key)['segments'])
+        for name in names:
+            check_cancelled(cancelled)
+            segment = segments[name]
+            base = self._number(name) << self.OFFSET_BITS
+            if segment.get('compression'):
+                for n, (offset, _, row) in enumerate(self._records(key, name)):
+                    if n % 4096 == 0:
+                        check_cancelled(cancelled)
+                    if any(needle in cell.lower() for cell in row) and (not since or row_stamp(key, row) >= since):
+                        refs.append(base | offset)
+                continue
+            path = self._path(key, segment)
+            with self._lock:
+                scan = self._scans.get(path)
+                if scan is None:
+                    scan = self._scans[path] = MappedScan(path)
+            offsets = scan.search_offsets(term, cancelled)
+            if since and len(offsets) and segment['first'] < since:
+                # the segment straddles the start of the range; check each hit's date
+                rows = CsvTailReader(path).read_at(offsets)
+                offsets = [o for o, row in zip(offsets, rows) if row_stamp(key, row) >= since]
+            refs.extend(base | o for o in offsets)
+        return refs
+
+    def fetch(self, category, refs):
+        """Return the rows for refs produced by search_refs."""
+        key = category.lower()
+        rows = [[] for _ in range(len(refs))]
+        wanted = {}
+        for i, ref in enumerate(refs):
+            name, offset = self._decode(ref)
+            wanted.setdefault(name, []).append((offset, i))
+        with self._lock:
+            segments = dict(self._manifest(key)['segments'])
+        for name, items in wanted.items():
+            segment = segments.get(name)
+            if segment is None:
+                continue
+            if not segment.get('compression'):
+                for (_, i), row in zip(items, CsvTailReader(self._path(key, segment)).read_at([o for o, _ in items])):
+                    rows[i] = row
+                continue
+            positions = {}
+            for offset, i in items:
+                positions.setdefault(offset, []).append(i)
+            first = min(positions)
+            for offset, _, row in self._records(key, name, first):
+                for i in positions.pop(offset, ()):
+                    rows[i] = row
+                if not positions:
+                    break
+        return rows
+
+    def search(self, category, term, cancelled=None):
+        """Return rows containing `term`."""
+        return self.fetch(category, self.search_refs(category, term, cancelled))
+
+    def close(self):
+        pass
+
+
+STORAGE_BACKENDS = {'csv': CsvBackend, 'sqlite': SqliteBackend, 'segmented': SegmentedBackend}
+
+
+class Histogram:
+    """Latency histogram in milliseconds with log-scale buckets doubling from 0.05 ms."""
+
+    BOUNDS = tuple(0.05 * 2 ** i for i in range(20))   # upper bucket edges, up to ~26 s
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(self.BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-th percentile (the max for the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50), 3),
+            'p95_ms': round(self.percentile(95), 3),
+            'p99_ms': round(self.percentile(99), 3),
+            'max_ms': round(self.max, 3),
+            'buckets': {f'<={b:g}': n for b, n in zip(self.BOUNDS + (float('inf'),), self.counts) if n},
+        }
+
+
+class Instruments:
+    """Named latency histograms fed by timing hooks.
+
+    When disabled nothing is wrapped and `record` returns after one attribute check,
+    so hooks left in hot paths cost next to nothing.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, ms):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(ms)
+
+    def wrap(self, name, fn):
+        """Return fn timed into histogram `name`."""
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, (time.perf_counter() - start) * 1000)
+        return timed
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def snapshot(self):
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self.histograms.items())}
+
+
+def create_tts_engine():
+    """Import and initialise pyttsx3; called on the speech thread so startup never waits for it."""
+    import pyttsx3
+    return pyttsx3.init()
+
+
+class FakeTtsEngine:
+    """Stands in for pyttsx3 in tests and benchmarks: records what was said, takes a fixed time
+    per character to 'speak' or render, and writes silent WAV files from save_to_file."""
+
+    def __init__(self, seconds_per_char=0.0):
+        self.seconds_per_char = seconds_per_char
+        self.spoken = []               # (perf_counter, text) as each utterance starts
+        self.finished = []             # perf_counter as each spoken batch ends
+        self.rendered = []
+        self.properties = {'voice': 'fake', 'rate': 165}
+        self._pending = []
+        self._files = []
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def connect(self, name, callback):
+        pass
+
+    def say(self, text):
+        self.spoken.append((time.perf_counter(), text))
+        self._pending.append(text)
+
+    def save_to_file(self, text, path):
+        self._files.append((text, path))
+
+    def runAndWait(self):
+        chars = sum(len(t) for t in self._pending) + sum(len(t) for t, _ in self._files)
+        if self.seconds_per_char:
+            time.sleep(self.seconds_per_char * chars)
+        for text, path in self._files:
+            with wave.open(path, 'wb') as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(8000)
+                w.writeframes(b'\0\0' * 80 * len(text))
+            self.rendered.append(text)
+        if self._pending:
+            self.finished.append(time.perf_counter())
+        self._pending, self._files = [], []
+
+    def stop(self):
+        pass
+
+
+class WavPlayer:
+    """Plays a rendered phrase: winsound on Windows, otherwise the first of aplay, paplay or afplay found.
+
+    play() blocks until the sound ends or `stop_requested()` turns true.
+    """
+
+    COMMANDS = (('aplay', '-q'), ('paplay',), ('afplay',))
+
+    def __init__(self):
+        self.command = None
+        self._winsound = None
+        if sys.platform == 'win32':
+            try:
+                import winsound
+                self._winsound = winsound
+            except ImportError:
+                pass
+        else:
+            for command in self.COMMANDS:
+                if shutil.which(command[0]):
+                    self.command = command
+                    break
+
+    @property
+    def available(self):
+        return self._winsound is not None or self.command is not None
+
+    def play(self, path, stop_requested=lambda: False):
+        if self._winsound is not None:
+            self._play_winsound(path, stop_requested)
+        elif self.command is not None:
+            proc = subprocess.Popen(self.command + (path,), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            while proc.poll() is None:
+                if stop_requested():
+                    proc.terminate()
+                    break
+                time.sleep(0.02)
+
+    def _play_winsound(self, path, stop_requested):
+        winsound = self._winsound
+        try:
+            with wave.open(path, 'rb') as w:
+                duration = w.getnframes() / float(w.getframerate())
+        except (OSError, wave.Error, ZeroDivisionError):
+            winsound.PlaySound(path, winsound.SND_FILENAME)
+            return
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            if stop_requested():
+                winsound.PlaySound(None, winsound.SND_PURGE)
+                return
+            time.sleep(0.02)
+
+
+class RecordingPlayer:
+    """A player for tests: remembers which files were played and returns at once."""
+
+    available = True
+
+    def __init__(self):
+        self.played = []
+
+    def play(self, path, stop_requested=lambda: False):
+        self.played.append((time.perf_counter(), path))
+
+
+class SpeechCache:
+    """Phrases rendered to audio files once, keyed by voice, rate and text.
+
+    One file per phrase, named by a hash of the key, so instances sharing the folder share
+    the cache. Playing a file refreshes its mtime; when the folder grows past `max_bytes`
+    the least recently played files are deleted.
+    """
+
+    def __init__(self, directory, max_bytes=20 << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # name -> size, least recently used first
+        self._total = 0
+        try:
+            os.makedirs(directory, exist_ok=True)
+            found = []
+            for entry in os.scandir(directory):
+                if entry.name.endswith('.wav') and entry.is_file():
+                    st = entry.stat()
+                    found.append((st.st_mtime, entry.name, st.st_size))
+        except OSError:
+            found = []
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._total += size
+
+    @staticmethod
+    def key(text, voice, rate):
+        return hashlib.sha1(f'{voice}\x1f{rate}\x1f{text}'.encode('utf-8')).hexdigest() + '.wav'
+
+    def get(self, text, voice, rate):
+        """Path of the rendered phrase, or None on a miss."""
+        name = self.key(text, voice, rate)
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+        try:
+            os.utime(path)
+        except OSError:
+            # deleted behind our back (another instance evicted it)
+            with self._lock:
+                self._total -= self._entries.pop(name, 0)
+            return None
+        return path
+
+    def render(self, engine, text, voice, rate):
+        """Synthesise `text` into the cache with the engine's save_to_file; returns the path or None."""
+        name = self.key(text, voice, rate)
+        path = os.path.join(self.directory, name)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        try:
+            engine.save_to_file(text, tmp)
+            engine.runAndWait()
+            size = os.path.getsize(tmp)
+            if not size:
+                raise OSError('empty rendering')
+            os.replace(tmp, path)
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return None
+        with self._lock:
+            self._total += size - self._entries.pop(name, 0)
+            self._entries[name] = size
+            self._evict()
+        return path
+
+    def _evict(self):
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._total
+
+
+class SpeechWorker:
+    """One long-lived thread that owns the TTS engine and speaks queued utterances.
+
+    Utterances carry a `kind`; queuing a new one makes any pending utterance of the
+    same kind stale, so rapid hover or page announcements never pile up. Lower
+    priority numbers are spoken first. No method here ever blocks the caller, and
+    utterances queued before `start` are simply buffered until the engine is up.
+
+    With a SpeechCache and a player, phrases found in the cache are played back
+    without synthesis. Prewarmed phrases, and misses of the repetitive kinds
+    (CACHED_KINDS), are rendered into the cache while the queue is empty; anything
+    else is spoken live as before.
+    """
+
+    PRIORITIES = {'alert': 0, 'feedback': 1, 'page': 2, 'welcome': 2, 'hover': 3}
+    CACHED_KINDS = ('page', 'welcome', 'hover', 'feedback')
+
+    def __init__(self, engine_factory, rate=165, maxsize=32, autostart=True, instruments=None,
+                 cache=None, player=None):
+        self.engine_factory = engine_factory
+        self.rate = rate
+        self.maxsize = maxsize
+        self.instruments = instruments
+        self.cache = cache if player is not None and getattr(player, 'available', False) else None
+        self.player = player
+        self.voice = None
+        self._warm = deque()           # phrases waiting to be rendered while idle
+        self._warm_queued = set()
+        self._unrenderable = set()     # phrases the engine failed to render; spoken live from now on
+        self.engine = None
+        self.ready_at = None           # perf_counter timestamp once the engine is initialised
+        self._heap = []
+        self._seq = itertools.count()
+        self._latest = {}              # kind -> sequence number of its newest utterance
+        self._cond = threading.Condition()
+        self._interrupt = False
+        self._current = None           # the entry being spoken, if any
+        self._stopped = False
+        self._thread = None
+        if autostart:
+            self.start()
+
+    def start(self):
+        """Start the worker thread (and with it the engine); safe to call more than once."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='memora-speech', daemon=True)
+        self._thread.start()
+
+    def say(self, text, kind=None, priority=None):
+        """Queue `text`; utterances with kind=None are never coalesced."""
+        if not text:
+            return
+        if priority is None:
+            priority = self.PRIORITIES.get(kind, 2)
+        with self._cond:
+            seq = next(self._seq)
+            if kind is not None:
+                self._latest[kind] = seq
+            heapq.heappush(self._heap, (priority, seq, kind, text, time.perf_counter()))
+            if len(self._heap) > self.maxsize:
+                self._trim()
+            self._cond.notify()
+
+    def prewarm(self, texts):
+        """Render these phrases into the cache in idle time, so their first use is already a hit."""
+        if self.cache is None:
+            return
+        with self._cond:
+            for text in texts:
+                if text and text not in self._warm_queued and text not in self._unrenderable:
+                    self._warm_queued.add(text)
+                    self._warm.append(text)
+            self._cond.notify()
+
+    def cancel(self, kinds=None):
+        """Drop pending utterances (all, or only the given kinds) and cut the current one short
+        when it is one of them."""
+        with self._cond:
+            if kinds is None:
+                self._heap = []
+                self._latest = {}
+            else:
+                self._heap = [e for e in self._heap if e[2] not in kinds]
+                heapq.heapify(self._heap)
+                for kind in kinds:
+                    self._latest.pop(kind, None)
+            current = self._current
+            if kinds is None or (current is not None and current[2] in kinds):
+                self._interrupt = True
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._heap = []
+            self._interrupt = True
+            self._cond.notify()
+
+    def _stale(self, entry):
+        kind = entry[2]
+        return kind is not None and self._latest.get(kind) != entry[1]
+
+    def _trim(self):
+        # drop stale entries first, then the least urgent (and oldest among equals)
+        self._heap = [e for e in self._heap if not self._stale(e)]
+        while len(self._heap) > self.maxsize:
+            worst = max(self._heap, key=lambda e: (e[0], -e[1]))
+            self._heap.remove(worst)
+        heapq.heapify(self._heap)
+
+    def _start_engine(self):
+        try:
+            # SAPI needs COM initialised on the thread that drives it
+            import comtypes
+            comtypes.CoInitialize()
+        except Exception:
+            pass
+        try:
+            self.engine = self.engine_factory()
+        except Exception:
+            # keep draining the queue silently when no TTS engine is available
+            self.engine = None
+            return
+        try:
+            self.engine.setProperty('rate', self.rate)
+            self.engine.connect('started-word', self._on_word)
+        except Exception:
+            pass
+        try:
+            self.voice = self.engine.getProperty('voice')
+        except Exception:
+            self.voice = None
+
+    def _on_word(self, name=None, location=None, length=None):
+        if self._interrupt:
+            try:
+                self.engine.stop()
+            except Exception:
+                pass
+
+    def _next(self):
+        with self._cond:
+            while True:
+                while not self._heap and not self._stopped:
+                    if self._warm and self.engine is not None:
+                        # nothing to say: render one phrase for later, then look again
+                        text = self._warm.popleft()
+                        self._cond.release()
+                        try:
+                            rendered = self._render(text)
+                        finally:
+                            self._cond.acquire()
+                        self._warm_queued.discard(text)
+                        if not rendered:
+                            self._unrenderable.add(text)
+                        continue
+                    self._cond.wait()
+                if self._stopped:
+                    return None
+                entry = heapq.heappop(self._heap)
+                if self._stale(entry):
+                    continue
+                if entry[2] is not None:
+                    self._latest.pop(entry[2], None)
+                self._interrupt = False
+                self._current = entry
+                return entry
+
+    def _run(self):
+        self._start_engine()
+        self.ready_at = time.perf_counter()
+        while True:
+            entry = self._next()
+            if entry is None:
+                return
+            if self.engine is None:
+                continue
+            try:
+                started = time.perf_counter()
+                if self.instruments is not None:
+                    self.instruments.record('speech:queue_to_audio', (started - entry[4]) * 1000)
+                path = self.cache.get(entry[3], self.voice, self.rate) if self.cache is not None else None
+                if path is not None:
+                    self.player.play(path, lambda: self._interrupt)
+                    name = 'speech:cached_utterance'
+                else:
+                    self.engine.say(entry[3])
+                    self.engine.runAndWait()
+                    name = 'speech:utterance'
+                    if entry[2] in self.CACHED_KINDS:
+                        self.prewarm([entry[3]])
+                if self.instruments is not None:
+                    self.instruments.record(name, (time.perf_counter() - started) * 1000)
+            except Exception:
+                # ignore TTS errors
+                pass
+            with self._cond:
+                self._current = None
+
+    def _render(self, text):
+        if self.cache.get(text, self.voice, self.rate) is not None:
+            return True
+        started = time.perf_counter()
+        path = self.cache.render(self.engine, text, self.voice, self.rate)
+        if self.instruments is not None:
+            self.instruments.record('speech:render', (time.perf_counter() - started) * 1000)
+        return path is not None
+
+
+class MinuteColumn:
+    """'YYYY-MM-DD HH:MM' stamps held as wall-clock minutes since 1970-01-01 in one array('q').
+
+    Values that do not round-trip through that format are kept verbatim on the side.
+    """
+
+    MISSING = -(1 << 63)
+    EPOCH = datetime(1970, 1, 1)
+
+    def __init__(self):
+        self.values = array('q')
+        self._raw = {}                 # row -> original text for unparseable stamps
+        self._days = {}                # 'YYYY-MM-DD' -> day number
+        self._day_text = {}            # day number -> 'YYYY-MM-DD'
+
+    def __len__(self):
+        return len(self.values)
+
+    def _day(self, text):
+        day = self._days.get(text)
+        if day is None:
+            # only canonical dates are cached, so formatting a value back gives the same text
+            parsed = datetime.strptime(text, '%Y-%m-%d')
+            if parsed.strftime('%Y-%m-%d') != text:
+                raise ValueError(text)
+            day = self._days[text] = (parsed - self.EPOCH).days
+            self._day_text[day] = text
+        return day
+
+    def parse(self, text):
+        if len(text) != 16 or text[10] != ' ' or text[13] != ':':
+            raise ValueError(text)
+        hour, minute = int(text[11:13]), int(text[14:16])
+        if not (0 <= hour < 24 and 0 <= minute < 60 and text[11].isdigit() and text[14].isdigit()):
+            raise ValueError(text)
+        return self._day(text[:10]) * 1440 + hour * 60 + minute
+
+    def append(self, text):
+        try:
+            self.values.append(self.parse(text))
+        except ValueError:
+            self._raw[len(self.values)] = text
+            self.values.append(self.MISSING)
+
+    def get(self, i):
+        value = self.values[i]
+        if value == self.MISSING:
+            return self._raw[i if i >= 0 else len(self.values) + i]
+        day, minutes = divmod(value, 1440)
+        return f'{self._day_text[day]} {minutes // 60:02d}:{minutes % 60:02d}'
+
+    def nbytes(self):
+        return self.values.itemsize * len(self.values)
+
+
+class DictColumn:
+    """Low-cardinality text (moods, dates, times) stored as codes into a table of distinct values."""
+
+    def __init__(self):
+        self.codes = array('I')
+        self.table = []
+        self._index = {}
+
+    def __len__(self):
+        return len(self.codes)
+
+    def append(self, text):
+        code = self._index.get(text)
+        if code is None:
+            code = self._index[text] = len(self.table)
+            self.table.append(text)
+        self.codes.append(code)
+
+    def get(self, i):
+        return self.table[self.codes[i]]
+
+    def nbytes(self):
+        return self.codes.itemsize * len(self.codes) + sum(len(t) for t in self.table)
+
+
+class TextColumn:
+    """Free text kept as UTF-8 in one contiguous buffer with an array of end offsets."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array('Q')
+
+    def __len__(self):
+        return len(self.ends)
+
+    def append(self, text):
+        self.data += text.encode('utf-8')
+        self.ends.append(len(self.data))
+
+    def get(self, i):
+        if i < 0:
+            i += len(self.ends)
+        start = self.ends[i - 1] if i else 0
+        return self.data[start:self.ends[i]].decode('utf-8')
+
+    def nbytes(self):
+        return len(self.data) + self.ends.itemsize * len(self.ends)
+
+
+class ColumnStore:
+    """Compact column-oriented rows for one category.
+
+    Indexing returns a row as a list of strings (slices return lists of rows), so the
+    store can stand in for a list of rows wherever the UI reads them. Rows longer than
+    the category layout are truncated and shorter ones padded, as in the SQLite backend.
+    """
+
+    KINDS = {
+        'reminders': {'date': DictColumn, 'due_time': DictColumn},
+        'notes': {'created': MinuteColumn},
+        'journal': {'created': MinuteColumn, 'mood': DictColumn},
+    }
+
+    def __init__(self, category=None):
+        self.category = category.lower() if category else None
+        self.fields = CATEGORY_FIELDS.get(self.category)
+        self.columns = None
+        if self.fields is not None:
+            self._make_columns(self.fields)
+
+    def _make_columns(self, fields):
+        kinds = self.KINDS.get(self.category, {})
+        self.columns = [kinds.get(field, TextColumn)() for field in fields]
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def append(self, row):
+        if self.columns is None:
+            # no category layout: take the width of the first row
+            self._make_columns([None] * max(1, len(row)))
+        columns = self.columns
+        for i, column in enumerate(columns):
+            column.append(str(row[i]) if i < len(row) else '')
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if not -len(self) <= i < len(self):
+            raise IndexError('row index out of range')
+        return [column.get(i) for column in self.columns]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def column(self, field):
+        return self.columns[self.fields.index(field)]
+
+    def nbytes(self):
+        """Approximate bytes held by the column data (excluding fixed object overhead)."""
+        return sum(column.nbytes() for column in self.columns or ())
+
+
+class RecordCache:
+    """In-memory copy of one category's rows for search-as-you-type.
+
+    Rows live in a ColumnStore. For matching, each row's cells are lower-cased and joined
+    by a separator that never appears in a typed term; these haystacks are packed into
+    one string per block of rows. A scan skips blocks without the term with a single `in`
+    test and only splits the rest into rows. When a new term contains the previous one
+    and matched few rows, only those matches are re-checked.
+    """
+
+    SEP = '\x1f'
+    END = '\x1e'                       # ends each row inside a block
+    BLOCK = 1024                       # rows per packed block
+
+    def __init__(self, rows=(), category=None):
+        self.rows = ColumnStore(category)
+        self._blocks = []              # full blocks of BLOCK haystacks, each followed by END
+        self._tail = []                # haystacks of the last, still open block
+        self._ends = array('I')        # end offset of each row within its block
+        self._last_term = None
+        self._last_ids = None
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def append(self, row):
+        row = [str(cell) for cell in row]
+        self.rows.append(row)
+        haystack = self.SEP.join(row).lower()
+        self._tail.append(haystack)
+        self._ends.append((self._ends[-1] if len(self._tail) > 1 else 0) + len(haystack) + 1)
+        if len(self._tail) == self.BLOCK:
+            self._blocks.append(self.END.join(self._tail) + self.END)
+            self._tail = []
+        # keep the previous result set valid for narrowing
+        if self._last_ids is not None and self._last_term in haystack:
+            self._last_ids.append(len(self.rows) - 1)
+
+    def _contains(self, i, needle):
+        block, j = divmod(i, self.BLOCK)
+        if block == len(self._blocks):
+            return needle in self._tail[j]
+        start = self._ends[i - 1] if j else 0
+        return self._blocks[block].find(needle, start, self._ends[i] - 1) != -1
+
+    def filter(self, term):
+        """Return the ids of rows containing `term` (case-insensitive), in insertion order."""
+        needle = term.lower()
+        if not needle:
+            return []
+        # re-checking rows one by one only pays off while the previous matches are few
+        if (self._last_ids is not None and self._last_term in needle
+                and len(self._last_ids) * 4 < len(self.rows)):
+            ids = [i for i in self._last_ids if self._contains(i, needle)]
+        else:
+            ids = []
+            for b, block in enumerate(self._blocks):
+                if needle in block:
+                    ids.extend([i for i, h in enumerate(block.split(self.END), b * self.BLOCK) if needle in h])
+            base = len(self._blocks) * self.BLOCK
+            ids.extend([i for i, h in enumerate(self._tail, base) if needle in h])
+        self._last_term, self._last_ids = needle, ids
+        return ids
+
+
+# ITU country calling codes one or two digits long; all others have three
+CALLING_CODES = {'1', '7', '20', '27', '30', '31', '32', '33', '34', '36', '39', '40', '41', '43', '44', '45',
+                 '46', '47', '48', '49', '51', '52', '53', '54', '55', '56', '57', '58', '60', '61', '62', '63',
+                 '64', '65', '66', '81', '82', '84', '86', '90', '91', '92', '93', '94', '95', '98'}
+
+
+def normalize_phone(phone):
+    """(country code, national number) of a phone number, for matching its different notations.
+
+    '+44 20 7946 0958' and '0044 20 7946 0958' give ('44', '2079460958'), '020 7946 0958'
+    gives ('', '2079460958'): a nationally written number has no country code. Leading
+    zeros of the national part (a trunk prefix, or '+44 (0)20') are dropped.
+    """
+    text = str(phone).strip()
+    digits = ''.join(ch for ch in text if '0' <= ch <= '9')
+    if not text.startswith('+') and not digits.startswith('00'):
+        return '', digits.lstrip('0')
+    if not text.startswith('+'):
+        digits = digits[2:]
+    size = 1 if digits[:1] in CALLING_CODES else 2 if digits[:2] in CALLING_CODES else 3
+    return digits[:size], digits[size:].lstrip('0')
+
+
+def same_number(a, b):
+    """Whether two normalize_phone() keys can be the same line; a national number matches any country."""
+    return bool(a[1]) and a[1] == b[1] and (not a[0] or not b[0] or a[0] == b[0])
+
+
+def normalize_name(name):
+    return ' '.join(str(name).casefold().split())
+
+
+def names_match(a, b):
+    """Whether two contact names can be the same person: one's words include the other's ('Ann', 'ann smith')."""
+    a, b = set(normalize_name(a).split()), set(normalize_name(b).split())
+    return not a or not b or a <= b or b <= a
+
+
+class ContactIndex:
+    """Hash index over contacts by national phone number and case-folded name.
+
+    Saved as JSON together with the storage's version token for contacts; a
+    different token on load (rows changed behind the index's back) means one
+    streaming rebuild.
+    """
+
+    VERSION = 3
+
+    def __init__(self, path):
+        self.path = path
+        self.phones = {}               # national number -> [rows]
+        self.names = {}                # name key -> [rows]
+        self.token = None
+        self.dirty = False
+
+    def load(self, token):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.VERSION or data.get('token') != json.loads(json.dumps(token)):
+                return False
+            # both maps refer to rows by their position in `rows`, so each row is stored once
+            rows = data['rows']
+            phones = {key: [rows[i] for i in ids] for key, ids in data['phones'].items()}
+            names = {key: [rows[i] for i in ids] for key, ids in data['names'].items()}
+        except (OSError, ValueError, KeyError, TypeError, IndexError, AttributeError):
+            return False
+        self.phones, self.names, self.token = phones, names, token
+        return True
+
+    def rebuild(self, rows, token):
+        self.phones, self.names = {}, {}
+        for row in rows:
+            self.add(row)
+        self.token = token
+        self.dirty = True
+
+    def save(self, token):
+        rows, ids = [], {}
+
+        def refs(table):
+            found = {}
+            for key, matches in table.items():
+                for row in matches:
+                    if id(row) not in ids:
+                        ids[id(row)] = len(rows)
+                        rows.append(row)
+                found[key] = [ids[id(row)] for row in matches]
+            return found
+
+        data = {'version': self.VERSION, 'token': token, 'names': refs(self.names), 'phones': refs(self.phones),
+                'rows': rows}
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.token = token
+        self.dirty = False
+
+    def add(self, row):
+        row = [str(cell) for cell in row[:2]] + [''] * (2 - len(row[:2]))
+        national = normalize_phone(row[1])[1]
+        if national:
+            self.phones.setdefault(national, []).append(row)
+        self.names.setdefault(normalize_name(row[0]), []).append(row)
+        self.dirty = True
+
+    def duplicate_of(self, row):
+        """The saved contact a new [name, phone] row duplicates: the same number under a matching
+        name, or the same name when neither has a number."""
+        name, phone = (list(row[:2]) + ['', ''])[:2]
+        if normalize_phone(phone)[1]:
+            matches = [r for r in self.by_phone(phone) if names_match(r[0], name)]
+        else:
+            matches = [r for r in self.names.get(normalize_name(name), ()) if not normalize_phone(r[1])[1]]
+        return matches[0] if matches else None
+
+    def by_phone(self, phone):
+        """Contacts whose number can be the same line as `phone`."""
+        key = normalize_phone(phone)
+        return [r for r in self.phones.get(key[1], ()) if same_number(normalize_phone(r[1]), key)] if key[1] else []
+
+    def by_name(self, name):
+        return list(self.names.get(normalize_name(name), ()))
+
+
+class ActivityStats:
+    """Running totals behind the Stats view, kept in a small JSON sidecar (stats.json).
+
+    Entries per day for the dated categories, a total per category, journal moods per
+    day and reminders per due hour. Saving a row updates them in O(1); a category whose
+    storage token no longer matches the sidecar is recounted in one streaming pass.
+    """
+
+    VERSION = 1
+    DATED = ('reminders', 'notes', 'journal')
+
+    def __init__(self, path):
+        self.path = path
+        self.tokens = {}
+        self.totals = dict.fromkeys(CATEGORY_FIELDS, 0)
+        self.days = {key: {} for key in self.DATED}    # key -> {'YYYY-MM-DD': entries}
+        self.moods = {}                                 # 'YYYY-MM-DD' -> {mood: entries}
+        self.hours = [0] * 24                           # reminders due in each hour of the day
+        self.dirty = False
+
+    @staticmethod
+    def token(value):
+        # tokens are compared after a JSON round trip, where tuples come back as lists
+        return json.loads(json.dumps(value))
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.VERSION:
+                return False
+            self.tokens, self.totals, self.days = data['tokens'], data['totals'], data['days']
+            self.moods, self.hours = data['moods'], data['hours']
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        return True
+
+    def save(self, tokens):
+        data = {'version': self.VERSION, 'tokens': self.token(tokens), 'totals': self.totals,
+                'days': self.days, 'moods': self.moods, 'hours': self.hours}
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self.tokens = data['tokens']
+        self.dirty = False
+
+    def rebuild(self, key, rows, token):
+        self.totals[key] = 0
+        if key in self.days:
+            self.days[key] = {}
+        if key == 'journal':
+            self.moods = {}
+        if key == 'reminders':
+            self.hours = [0] * 24
+        for row in rows:
+            self.add(key, row)
+        self.tokens[key] = self.token(token)
+        self.dirty = True
+
+    def adopt(self, key, other):
+        """Take one category's figures over from `other`, where it was recounted."""
+        self.totals[key] = other.totals[key]
+        if key in self.days:
+            self.days[key] = other.days[key]
+        if key == 'journal':
+            self.moods = other.moods
+        if key == 'reminders':
+            self.hours = other.hours
+        self.tokens[key] = other.tokens[key]
+        self.dirty = True
+
+    def add(self, key, row):
+        self.totals[key] = self.totals.get(key, 0) + 1
+        self.dirty = True
+        if key not in self.days:
+            return
+        day = row_stamp(key, row)[:10]
+        if not re.match(r'\d{4}-\d{2}-\d{2}$', day):
+            return
+        days = self.days.setdefault(key, {})
+        days[day] = days.get(day, 0) + 1
+        if key == 'journal' and len(row) > 1:
+            mood = ' '.join(str(row[1]).casefold().split())
+            if mood:
+                moods = self.moods.setdefault(day, {})
+                moods[mood] = moods.get(mood, 0) + 1
+        elif key == 'reminders' and len(row) > 1:
+            try:
+                hour = int(str(row[1]).split(':')[0])
+            except ValueError:
+                return
+            if 0 <= hour < 24:
+                self.hours[hour] += 1
+
+    def summary(self, days=7, weeks=8, today=None):
+        """Daily counts for the last `days` days, weekly counts (Monday first) for the last `weeks`
+        weeks, moods over both windows and all time, and the reminder load per hour."""
+        today = (today or datetime.now()).date()
+        daily = []
+        for back in range(days - 1, -1, -1):
+            day = (today - timedelta(days=back)).isoformat()
+            daily.append((day, {key: self.days.get(key, {}).get(day, 0) for key in self.DATED}))
+        first_monday = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+        weekly = [((first_monday + timedelta(weeks=i)).isoformat(), dict.fromkeys(self.DATED, 0))
+                  for i in range(weeks)]
+        for key in self.DATED:
+            for day, count in self.days.get(key, {}).items():
+                try:
+                    index = (datetime.strptime(day, '%Y-%m-%d').date() - first_monday).days // 7
+                except ValueError:
+                    continue
+                if 0 <= index < weeks:
+                    weekly[index][1][key] += count
+        recent_since = daily[0][0]
+        moods_recent, moods_weeks, moods_all = {}, {}, {}
+        for day, counts in self.moods.items():
+            for mood, count in counts.items():
+                moods_all[mood] = moods_all.get(mood, 0) + count
+                if day >= weekly[0][0]:
+                    moods_weeks[mood] = moods_weeks.get(mood, 0) + count
+                if day >= recent_since:
+                    moods_recent[mood] = moods_recent.get(mood, 0) + count
+
+        def ranked(counts):
+            return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+        return {'days': daily, 'weeks': weekly, 'totals': dict(self.totals), 'hours': list(self.hours),
+                'moods': {'recent': ranked(moods_recent), 'weeks': ranked(moods_weeks), 'all': ranked(moods_all)}}
+
+
+class InvalidEntry(ValueError):
+    """An entry that fails validation; `title` is a short heading for the warning."""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+
+
+class StorageUnavailable(Exception):
+    """The configured storage backend could not be opened."""
+
+
+class MemoraCore:
+    """Record API shared by the Tk app, the command line and the benchmarks.
+
+    Categories are the keys of CATEGORY_FIELDS; display names such as 'Notes' are accepted too.
+    """
+
+    def __init__(self, directory='.', storage_kind='csv', fsync='interval', fsync_ms=1000, search='index',
+                 scan_workers=1):
+        self.directory = directory
+        self.storage = self._open_storage(storage_kind, fsync, fsync_ms, search, scan_workers)
+        self._contacts = None
+        self._contacts_lock = threading.Lock()
+        self._contacts_build = threading.Lock()
+        self._contacts_missed = None   # while the index is built: True once a contact was saved meanwhile
+        # a save and a rewrite of the same rows (duplicate clean-up) never overlap: saves made during
+        # a clean-up are queued here and written when it ends, so the caller never waits for it
+        self._save_lock = threading.RLock()
+        self._queued = None
+        self._dedupe_lock = threading.Lock()
+        self._stats = None
+        self._stats_lock = threading.Lock()
+        self._stats_build = threading.Lock()
+        self._stats_missed = None      # while the aggregates are built: categories saved to meanwhile
+        self._stats_saves = {}         # category -> saves counted so far, to tell if a recount missed one
+        self._following = False
+
+    def _open_storage(self, storage_kind, fsync, fsync_ms, search, scan_workers):
+        """Open the configured backend; raises StorageUnavailable rather than switching to another one.
+
+        Entries saved to a different store would seem lost the next time the configured one opens.
+        """
+        backend_class = STORAGE_BACKENDS.get(storage_kind)
+        if backend_class is None:
+            raise StorageUnavailable(f'Unknown storage backend: {storage_kind}')
+        try:
+            if backend_class is CsvBackend:
+                return CsvBackend(self.directory, writer=WriteBehindWriter(fsync=fsync, fsync_ms=fsync_ms),
+                                  search=search, scan_workers=scan_workers)
+            return backend_class(self.directory)
+        except Exception as e:
+            raise StorageUnavailable(f'Could not open the {storage_kind} storage in '
+                                     f'{os.path.abspath(self.directory)}: {e}') from e
+
+    @staticmethod
+    def category_key(category):
+        key = category.lower()
+        if key not in CATEGORY_FIELDS:
+            raise InvalidEntry('Unknown category', f'Unknown category: {category}')
+        return key
+
+    def build_row(self, category, values, now=None):
+        """Validate form values (title, time, content, name, phone, mood, notes) into a stored row."""
+        key = self.category_key(category)
+        now = now or datetime.now()
+
+        def get(name):
+            return (values.get(name) or '').strip()
+
+        if key == 'reminders':
+            title, time_text = get('title'), get('time')
+            if not title or not time_text:
+                raise InvalidEntry('Missing', 'Please enter title and time')
+            try:
+                due = datetime.strptime(time_text, '%H:%M')
+            except ValueError:
+                raise InvalidEntry('Invalid time', 'Please enter the time as HH:MM')
+            # store the day the reminder is due: today, or tomorrow if that time has passed
+            due = now.replace(hour=due.hour, minute=due.minute, second=0, microsecond=0)
+            if due <= now:
+                due += timedelta(days=1)
+            return [due.strftime('%Y-%m-%d'), due.strftime('%H:%M'), title]
+        if key == 'notes':
+            title, content = get('title'), get('content')
+            if not title or not content:
+                raise InvalidEntry('Missing', 'Please enter title and content')
+            return [now.strftime('%Y-%m-%d %H:%M'), title, content]
+        if key == 'contacts':
+            name, phone = get('name'), get('phone')
+            if not name or not phone:
+                raise InvalidEntry('Missing', 'Please enter name and phone')
+            return [name, phone]
+        mood = get('mood')
+        if not mood:
+            raise InvalidEntry('Missing', 'Please enter your mood')
+        return [now.strftime('%Y-%m-%d %H:%M'), mood, get('notes')]
+
+    def save(self, category, row):
+        key = self.category_key(category)
+        with self._save_lock:
+            if self._queued is not None:
+                self._queued.append((self._store, key, row))
+                return row
+            self._store(key, row)
+        return row
+
+    def _store(self, key, row):
+        self.storage.append(key, row)
+        if key == 'contacts':
+            self._index_contacts([row])
+        self._count(key, [row])
+
+    def save_many(self, category, rows):
+        """Store a batch of already validated rows in one write (or one transaction).
+
+        Contacts that duplicate a saved one (or an earlier row of the batch) are skipped;
+        returns the number of rows stored. During a contact clean-up the batch is queued
+        and every row counts as stored.
+        """
+        key = self.category_key(category)
+        rows = list(rows)
+        with self._save_lock:
+            if self._queued is not None:
+                self._queued.append((self._store_many, key, rows))
+                return len(rows)
+            return self._store_many(key, rows)
+
+    def _store_many(self, key, rows):
+        if key == 'contacts':
+            index = self.contact_index()
+            fresh = []
+            for row in rows:
+                if index.duplicate_of(row) is None:
+                    index.add(row)
+                    fresh.append(row)
+            rows = fresh
+        if rows:
+            self.storage.append_many(key, rows)
+            self._count(key, rows)
+        return len(rows)
+
+    # --- statistics ---
+
+    def _count(self, key, rows):
+        # saved rows go into the aggregates. While stats() is still building them the category is
+        # only marked, and stats() counts it again before it returns.
+        with self._stats_lock:
+            self._stats_saves[key] = self._stats_saves.get(key, 0) + 1
+            if self._stats is None:
+                if self._stats_missed is not None:
+                    self._stats_missed.add(key)
+            else:
+                for row in rows:
+                    self._stats.add(key, row)
+
+    def _recount(self, key, rows=None):
+        # a rewritten category is counted again from `rows` (or from storage) into fresh aggregates,
+        # outside the lock so saves never wait for the pass; one saved to meanwhile goes round again
+        while True:
+            with self._stats_lock:
+                if self._stats is None:
+                    if self._stats_missed is not None:
+                        self._stats_missed.add(key)
+                    return
+                saves = self._stats_saves.get(key, 0)
+            fresh = ActivityStats(None)
+            token = self.storage.version_token(key)
+            fresh.rebuild(key, self.storage.iter_rows(key) if rows is None else rows, token)
+            with self._stats_lock:
+                if self._stats_saves.get(key, 0) == saves:
+                    self._stats.adopt(key, fresh)
+                    return
+            rows = None
+
+    def stats(self):
+        """The activity aggregates, loaded from stats.json; stale or missing categories are recounted."""
+        with self._stats_build:
+            if self._stats is not None:
+                return self._stats
+            with self._stats_lock:
+                self._stats_missed = set()
+            stats = ActivityStats(os.path.join(self.directory, 'stats.json'))
+            stats.load()
+            stale = [key for key in CATEGORY_FIELDS
+                     if stats.tokens.get(key) != ActivityStats.token(self.storage.version_token(key))]
+            while True:
+                for key in stale:
+                    # the token is taken first: rows saved during the pass make it stale, never current
+                    token = self.storage.version_token(key)
+                    stats.rebuild(key, self.storage.iter_rows(key), token)
+                with self._stats_lock:
+                    stale = self._stats_missed
+                    if not stale:
+                        self._stats, self._stats_missed = stats, None
+                        return stats
+                    self._stats_missed = set()
+
+    def stats_summary(self, days=7, weeks=8):
+        stats = self.stats()
+        with self._stats_lock:
+            return stats.summary(days, weeks)
+
+    # --- contacts ---
+
+    def contact_index(self):
+        """The contact hash index, loaded (or rebuilt in one pass) on first use."""
+        with self._contacts_build:
+            index = self._contacts
+            if index is not None:
+                return index
+            with self._contacts_lock:
+                self._contacts_missed = False
+            index = ContactIndex(os.path.join(self.directory, 'contacts.idx'))
+            token = self.storage.version_token('contacts')
+            loaded = index.load(token)
+            while True:
+                if not loaded:
+                    index.rebuild(self.storage.iter_rows('contacts'), token)
+                with self._contacts_lock:
+                    if not self._contacts_missed:
+                        self._contacts, self._contacts_missed = index, None
+                        return index
+                    self._contacts_missed = False
+                # contacts were saved during the pass: build it again
+                token, loaded = self.storage.version_token('contacts'), False
+
+    def _index_contacts(self, rows):
+        # saved contacts go into the index; None means the contacts were rewritten elsewhere
+        with self._contacts_lock:
+            if self._contacts_missed is not None:
+                self._contacts_missed = True
+            elif rows is None:
+                self._contacts = None
+            elif self._contacts is not None:
+                for row in rows:
+                    self._contacts.add(row)
+
+    def find_duplicate(self, row):
+        """The saved contact that [name, phone] duplicates, or None; O(1)."""
+        return self.contact_index().duplicate_of(row)
+
+    def same_number(self, row):
+        """Saved contacts with the number of a [name, phone] row, whatever their name."""
+        return self.contact_index().by_phone(row[1]) if len(row) > 1 else []
+
+    def lookup_phone(self, phone):
+        """Contacts with this phone number in any common notation, without scanning."""
+        return self.contact_index().by_phone(phone)
+
+    def dedupe_contacts(self, cancelled=None):
+        """Merge contacts with the same number and a matching name (or, without a number, the same
+        name) in one streaming pass.
+
+        The fuller name and an international (+) form of the number are kept; returns the
+        number of rows removed. Saves here are queued and appends from other instances
+        wait until the rewrite is done, so nothing saved meanwhile is lost.
+        """
+        with self._dedupe_lock:
+            with self._save_lock:
+                self._queued = []
+            try:
+                with self.storage.exclusive('contacts'):
+                    return self._dedupe_contacts(cancelled)
+            finally:
+                with self._save_lock:
+                    queued, self._queued = self._queued, None
+                    for store, key, rows in queued:
+                        store(key, rows)
+
+    def _dedupe_contacts(self, cancelled):
+        merged = []                    # [name, phone, phone key] in first-seen order
+        by_number = {}                 # national number -> entries of merged
+        by_name = {}                   # name -> entry without a number
+        total = 0
+        for n, row in enumerate(self.storage.iter_rows('contacts')):
+            if n % 4096 == 0:
+                check_cancelled(cancelled)
+            total += 1
+            name, phone = (list(row[:2]) + ['', ''])[:2]
+            name, phone = name.strip(), phone.strip()
+            key = normalize_phone(phone)
+            if key[1]:
+                candidates = by_number.setdefault(key[1], [])
+                kept = next((e for e in candidates if same_number(e[2], key) and names_match(e[0], name)), None)
+            else:
+                kept = by_name.get(normalize_name(name))
+            if kept is None:
+                kept = [name, phone, key]
+                merged.append(kept)
+                if key[1]:
+                    candidates.append(kept)
+                else:
+                    by_name[normalize_name(name)] = kept
+                continue
+            if len(name) > len(kept[0]):
+                kept[0] = name
+            if key[0] and not kept[2][0]:
+                # the group is now tied to this country
+                kept[2] = key
+            if phone.startswith('+') and not kept[1].startswith('+'):
+                kept[1] = phone
+        removed = total - len(merged)
+        if removed:
+            check_cancelled(cancelled)
+            rows = [entry[:2] for entry in merged]
+            self.storage.rewrite('contacts', rows)
+            with self._contacts_lock:
+                index = ContactIndex(os.path.join(self.directory, 'contacts.idx'))
+                index.rebuild(rows, self.storage.version_token('contacts'))
+                self._contacts = index
+                if self._contacts_missed is not None:
+                    # an index being built read the old rows
+                    self._contacts_missed = True
+            self._recount('contacts', rows)
+        return removed
+
+    def add(self, category, values, now=None):
+        """Validate and save one entry; returns the stored row."""
+        return self.save(category, self.build_row(category, values, now))
+
+    def recent(self, category, count=50, before=None):
+        """Newest rows first as (rows, older, newer); pass `older` back as `before` for the next page."""
+        return self.storage.page_before(self.category_key(category), before=before, count=count)
+
+    def newer(self, category, after, count=50):
+        return self.storage.page_after(self.category_key(category), after, count=count)
+
+    def search(self, category, term, cancelled=None, days=None):
+        """Record refs whose fields contain `term` (case-insensitive), oldest first.
+
+        With `days`, only entries dated within that many days are returned (all contacts match).
+        """
+        key = self.category_key(category)
+        since = self.since(days) if days and key != 'contacts' else None
+        if since and self.storage.ranged:
+            return self.storage.search_refs(key, term, cancelled=cancelled, since=since)
+        refs = self.storage.search_refs(key, term, cancelled=cancelled)
+        if not since:
+            return refs
+        kept = array(refs.typecode)
+        for start in range(0, len(refs), 1000):
+            check_cancelled(cancelled)
+            chunk = refs[start:start + 1000]
+            kept.extend(ref for ref, row in zip(chunk, self.storage.fetch(key, chunk)) if row_stamp(key, row) >= since)
+        return kept
+
+    @staticmethod
+    def since(days):
+        return (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M')
+
+    def rows_between(self, category, since=None, until=None):
+        """Yield rows dated since <= stamp < until ('YYYY-MM-DD[ HH:MM]' strings, either may be None)."""
+        key = self.category_key(category)
+        if self.storage.ranged:
+            yield from self.storage.iter_rows(key, since=since, until=until)
+            return
+        for row in self.storage.iter_rows(key):
+            stamp = row_stamp(key, row)
+            if (since and stamp < since) or (until and stamp >= until):
+                continue
+            yield row
+
+    def compress_old(self, compression='gz', older_than_months=3, cancelled=None):
+        """Compress old month segments when the storage supports it; returns how many were compressed."""
+        compress = getattr(self.storage, 'compress_segments', None)
+        if compress is None:
+            return 0
+        return compress(compression, older_than_months, cancelled=cancelled)
+
+    def fetch(self, category, refs):
+        return self.storage.fetch(self.category_key(category), refs)
+
+    def iter_rows(self, category):
+        return self.storage.iter_rows(self.category_key(category))
+
+    def record_cache(self, category):
+        return RecordCache(self.iter_rows(category), category=self.category_key(category))
+
+    def changes(self):
+        """What other instances sharing the directory saved since the last call, as {category: rows}.
+
+        A category maps to None when it was rewritten elsewhere and has to be reread. The
+        first call only marks the starting point, so make it before loading anything.
+        """
+        self._following = True
+        found = {}
+        for key in CATEGORY_FIELDS:
+            try:
+                rows = self.storage.changes(key)
+            except Exception:
+                continue
+            if rows is None or rows:
+                found[key] = rows
+        for key, rows in found.items():
+            if rows is None:
+                self._recount(key)
+            else:
+                self._count(key, rows)
+        if 'contacts' in found:
+            self._index_contacts(found['contacts'])
+        return found
+
+    def close(self):
+        index, stats = self._contacts, self._stats
+        token = self.storage.version_token('contacts') if index is not None and index.dirty else None
+        tokens = None
+        if stats is not None and stats.dirty:
+            tokens = {key: self.storage.version_token(key) for key in CATEGORY_FIELDS}
+        if self._following and (token is not None or tokens is not None):
+            # rows other instances saved up to the tokens are counted in before they are stamped
+            self.changes()
+        self.storage.close()
+        if token is not None:
+            try:
+                index.save(token)
+            except OSError:
+                pass
+        if tokens is not None:
+            try:
+                stats.save(tokens)
+            except OSError:
+                pass
@@ -1,16 +1,525 @@
 import tkinter as tk
-from tkinter import messagebox, simpledialog, ttk
+from tkinter import messagebox, simpledialog, ttk, filedialog
 import os
+import sys
+import argparse
 import json
-import pyttsx3
+import time
+import heapq
+import itertools
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 import csv
-from datetime import datetime
+from datetime import datetime, timedelta
 import random
 
+from memora_core import (CATEGORY_FIELDS, JobCancelled, SpeechWorker, create_tts_engine,
+                         InvalidEntry, MemoraCore, STORAGE_BACKENDS, Instruments,
+                         SpeechCache, WavPlayer, FakeTtsEngine, RecordingPlayer, StorageUnavailable,
+                         file_lock)
+
+
+class Job:
+    """Handle for one background job; the worker function receives it to poll for cancellation."""
+
+    def __init__(self, key, on_done=None, on_error=None):
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.future = None
+        self.submitted = time.perf_counter()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+
+class JobExecutor:
+    """Runs blocking reads and scans on a thread pool and hands results back to Tk.
+
+    Results are collected by a `root.after` poll, so callbacks always run on the Tk
+    thread. Jobs are keyed: submitting a job whose key is still running cancels the
+    older one and its result is discarded. Different keys run side by side.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, root, max_workers=4, on_busy=None, instruments=None):
+        self.root = root
+        self.on_busy = on_busy
+        self.instruments = instruments
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='memora-job')
+        self._jobs = {}                # key -> the current Job for that key
+        self._polling = False
+
+    def submit(self, key, fn, on_done=None, on_error=None):
+        """Run fn(job) in the background, then on_done(result) or on_error(exc) on the Tk thread."""
+        self.cancel(key)
+        job = Job(key, on_done, on_error)
+        job.future = self.pool.submit(fn, job)
+        self._jobs[key] = job
+        self._busy_changed()
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+        return job
+
+    def cancel(self, key):
+        job = self._jobs.pop(key, None)
+        if job is not None:
+            job.cancel()
+            self._busy_changed()
+
+    def shutdown(self):
+        for key in list(self._jobs):
+            self.cancel(key)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _busy_changed(self):
+        if self.on_busy is not None:
+            try:
+                self.on_busy(len(self._jobs))
+            except Exception:
+                pass
+
+    def _poll(self):
+        finished = [job for job in self._jobs.values() if job.future.done()]
+        try:
+            for job in finished:
+                del self._jobs[job.key]
+                try:
+                    result = job.future.result()
+                except JobCancelled:
+                    continue
+                except Exception as e:
+                    if job.on_error is not None:
+                        job.on_error(e)
+                    continue
+                if job.on_done is not None:
+                    job.on_done(result)
+                if self.instruments is not None:
+                    # submit to result handled, per kind of job ('view', 'search', ...)
+                    self.instruments.record('job:' + job.key.split(':', 1)[0],
+                                            (time.perf_counter() - job.submitted) * 1000)
+        finally:
+            # keep polling even if a callback raised
+            if finished:
+                self._busy_changed()
+            if self._jobs:
+                self.root.after(self.POLL_MS, self._poll)
+            else:
+                self._polling = False
+
+
+class LagMonitor:
+    """Measures Tk event-loop lag: how late a periodic `after` heartbeat fires."""
+
+    def __init__(self, root, instruments, interval_ms=100):
+        self.root = root
+        self.instruments = instruments
+        self.interval_ms = interval_ms
+        self.last_lag_ms = 0.0
+        self._timer = None
+        self._due = None
+
+    def start(self):
+        if self._timer is None:
+            self._schedule()
+
+    def stop(self):
+        if self._timer is not None:
+            try:
+                self.root.after_cancel(self._timer)
+            except Exception:
+                pass
+            self._timer = None
+
+    def _schedule(self):
+        self._due = time.perf_counter() + self.interval_ms / 1000.0
+        self._timer = self.root.after(self.interval_ms, self._beat)
+
+    def _beat(self):
+        self.last_lag_ms = max(0.0, (time.perf_counter() - self._due) * 1000)
+        self.instruments.record('tk:event_loop_lag', self.last_lag_ms)
+        self._schedule()
+
+
+class ListSource:
+    """Rows already in memory, optionally addressed through a list of row ids."""
+
+    def __init__(self, rows, ids=None):
+        self._rows = rows
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids) if self._ids is not None else len(self._rows)
+
+    def rows(self, start, stop):
+        if self._ids is None:
+            return self._rows[start:stop]
+        return [self._rows[i] for i in self._ids[start:stop]]
+
+
+class RefSource:
+    """Search hits held as compact refs; rows are fetched from storage a page at a time.
+
+    Only the last few pages are kept, so memory does not grow with the hit count.
+    """
+
+    PAGE = 100
+    KEEP = 8
+
+    def __init__(self, storage, category, refs):
+        self.storage = storage
+        self.category = category
+        self.refs = refs
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        return len(self.refs)
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is None:
+            start = number * self.PAGE
+            page = self.storage.fetch(self.category, self.refs[start:start + self.PAGE])
+            self._pages[number] = page
+            while len(self._pages) > self.KEEP:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page
+
+    def rows(self, start, stop):
+        out = []
+        for number in range(start // self.PAGE, (max(stop, start + 1) - 1) // self.PAGE + 1):
+            base = number * self.PAGE
+            page = self._page(number)
+            out.extend(page[max(start - base, 0):stop - base])
+        return out
+
+
+class VirtualResults:
+    """Treeview that only ever holds the visible window of rows.
+
+    The source needs len() and rows(start, stop). Rows are requested as the user
+    scrolls, so memory and render time stay the same for 50 or 500k results.
+    """
+
+    def __init__(self, parent, columns=(), height=10):
+        self.height = height
+        self.source = None
+        self.first = 0
+        self.items = []
+        self.frame = tk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, show='headings', height=height, selectmode='browse')
+        self.scroll = ttk.Scrollbar(self.frame, orient='vertical', command=self._on_scrollbar)
+        self.tree.pack(side='left', fill='both', expand=True)
+        self.scroll.pack(side='right', fill='y')
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self._on_wheel)
+        self.tree.bind('<Prior>', lambda e: self.scroll_to(self.first - self.height))
+        self.tree.bind('<Next>', lambda e: self.scroll_to(self.first + self.height))
+        self.set_columns(columns)
+
+    def set_columns(self, columns):
+        columns = list(columns)
+        if list(self.tree['columns']) == columns:
+            return
+        self.tree.configure(columns=columns)
+        for column in columns:
+            self.tree.heading(column, text=column.replace('_', ' ').title())
+            self.tree.column(column, width=120, stretch=True)
+
+    def set_source(self, source, columns=None):
+        if columns is not None:
+            self.set_columns(columns)
+        self.source = source
+        self.first = 0
+        self.render()
+
+    def total(self):
+        return len(self.source) if self.source is not None else 0
+
+    def render(self):
+        total = self.total()
+        count = max(0, min(self.height, total - self.first))
+        rows = self.source.rows(self.first, self.first + count) if count else []
+        # reuse the same few items; only their values change while scrolling
+        while len(self.items) < len(rows):
+            self.items.append(self.tree.insert('', 'end'))
+        while len(self.items) > len(rows):
+            self.tree.delete(self.items.pop())
+        for iid, row in zip(self.items, rows):
+            self.tree.item(iid, values=[str(cell).replace('\n', ' ') for cell in row])
+        if total:
+            self.scroll.set(self.first / total, (self.first + count) / total)
+        else:
+            self.scroll.set(0, 1)
+
+    def scroll_to(self, first):
+        first = max(0, min(int(first), self.total() - self.height))
+        if first != self.first:
+            self.first = first
+            self.render()
+        return 'break'
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]) * self.total())
+        elif args[0] == 'scroll':
+            step = self.height if args[2] == 'pages' else 1
+            self.scroll_to(self.first + int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            delta = -3
+        elif event.num == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        return self.scroll_to(self.first + delta)
+
+
+class ReminderScheduler:
+    """Min-heap of pending reminders driven by a single re-armed `after` timer.
+
+    A reminder is keyed by its date, time, title and occurrence number. Fired and
+    snoozed states are appended to a small log, so a restart never fires a
+    reminder twice; instances sharing the log check it under a lock before firing,
+    so only one of them shows each reminder. Reminders overdue by more than GRACE
+    seconds at startup are skipped rather than fired in a burst.
+
+    The log is read incrementally, so a fire only parses lines added since the last
+    one, and load() compacts it to the latest state per reminder, dropping reminders
+    more than KEEP seconds past.
+    """
+
+    GRACE = 3600
+    KEEP = 7 * 24 * 3600
+    # re-check at least this often so clock changes or suspend cannot strand the timer
+    MAX_SLEEP_MS = 10 * 60 * 1000
+
+    def __init__(self, root, state_path, on_fire):
+        self.root = root
+        self.state_path = state_path
+        self.on_fire = on_fire
+        self.heap = []                 # (due epoch seconds, seq, key, title)
+        self.loaded = False
+        self._seq = itertools.count()
+        self._counts = {}              # date|time|title -> occurrences seen
+        self._timer = None
+        self._states = {}              # key -> (state, until), as read from the log so far
+        self._log_id = None            # (inode, device) of the log read so far
+        self._log_pos = 0
+        self._log_lines = 0
+
+    @staticmethod
+    def parse_due(date, time_text):
+        try:
+            return datetime.strptime(f'{date} {time_text}'.strip(), '%Y-%m-%d %H:%M').timestamp()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _key(counts, date, time_text, title):
+        base = f'{date}|{time_text}|{title}'
+        n = counts.get(base, 0)
+        counts[base] = n + 1
+        return f'{base}#{n}'
+
+    def _read_states(self):
+        # fold in the lines appended since the last call; a log compacted (replaced) by any instance
+        # is read again from the start. Callers hold the file lock.
+        try:
+            with open(self.state_path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if (st.st_ino, st.st_dev) != self._log_id or st.st_size < self._log_pos:
+                    self._states, self._log_pos, self._log_lines = {}, 0, 0
+                    self._log_id = (st.st_ino, st.st_dev)
+                f.seek(self._log_pos)
+                data = f.read()
+        except FileNotFoundError:
+            self._states, self._log_id, self._log_pos, self._log_lines = {}, None, 0, 0
+            return self._states
+        # a line still without its newline is read once it is complete
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            self._log_lines += 1
+            try:
+                key, state, until = json.loads(line)
+            except ValueError:
+                # a torn line from a crash
+                continue
+            self._states[key] = (state, until)
+        self._log_pos += end
+        return self._states
+
+    def _compact(self, now):
+        # rewrite the log with the latest state of each reminder that is not long past; caller holds the lock
+        self._log_id = None
+        states = self._read_states()
+        horizon = now - self.KEEP
+
+        def recent(key, state, until):
+            stamp = until if state == 'snoozed' and until else self.parse_due(*key.split('|', 2)[:2])
+            return stamp is None or stamp >= horizon
+
+        kept = {key: value for key, value in states.items() if recent(key, *value)}
+        if self._log_lines <= len(kept):
+            return states
+        tmp = f'{self.state_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                for key, (state, until) in kept.items():
+                    f.write(json.dumps([key, state, until]) + '\n')
+            os.replace(tmp, self.state_path)
+            st = os.stat(self.state_path)
+        except OSError:
+            # compaction only saves time; the full log is still valid
+            return states
+        self._states, self._log_lines = kept, len(kept)
+        self._log_id, self._log_pos = (st.st_ino, st.st_dev), st.st_size
+        return kept
+
+    def load(self, rows, now=None):
+        """Build the pending heap from reminder rows; touches no Tk state, so it can run in a job."""
+        now = time.time() if now is None else now
+        with file_lock(self.state_path):
+            states = dict(self._compact(now))
+        counts = {}
+        heap = []
+        for row in rows:
+            if len(row) < 3:
+                continue
+            date, time_text, title = row[0], row[1], row[2]
+            key = self._key(counts, date, time_text, title)
+            state, until = states.get(key, (None, None))
+            if state == 'fired':
+                continue
+            due = until if state == 'snoozed' else self.parse_due(date, time_text)
+            if due is None or due < now - self.GRACE:
+                continue
+            heap.append((due, next(self._seq), key, title))
+        heapq.heapify(heap)
+        return heap, counts
+
+    def install(self, loaded):
+        """Adopt the result of load() and arm the timer (Tk thread)."""
+        self.heap, self._counts = loaded
+        self.loaded = True
+        self._arm()
+
+    def add(self, date, time_text, title):
+        """Schedule a newly saved reminder in O(log n)."""
+        key = self._key(self._counts, date, time_text, title)
+        due = self.parse_due(date, time_text)
+        if due is None:
+            return
+        heapq.heappush(self.heap, (due, next(self._seq), key, title))
+        if self.heap[0][2] == key:
+            self._arm()
+
+    def snooze(self, key, title, minutes=10):
+        until = time.time() + minutes * 60
+        self._log(key, 'snoozed', until)
+        heapq.heappush(self.heap, (until, next(self._seq), key, title))
+        self._arm()
+
+    def stop(self):
+        if self._timer is not None:
+            try:
+                self.root.after_cancel(self._timer)
+            except Exception:
+                pass
+            self._timer = None
+
+    def _log(self, key, state, until=None):
+        try:
+            with file_lock(self.state_path), open(self.state_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps([key, state, until]) + '\n')
+        except OSError:
+            pass
+
+    def _claim(self, key, due):
+        # the first instance to mark a reminder fired shows it; one snoozed elsewhere is left to that instance
+        with file_lock(self.state_path):
+            state, until = self._read_states().get(key, (None, None))
+            if state == 'fired' or (state == 'snoozed' and until is not None and until > due):
+                return False
+            self._log(key, 'fired')
+            return True
+
+    def _arm(self):
+        self.stop()
+        if not self.heap:
+            return
+        delay = max(0, int((self.heap[0][0] - time.time()) * 1000))
+        self._timer = self.root.after(min(delay, self.MAX_SLEEP_MS), self._tick)
+
+    def _tick(self):
+        self._timer = None
+        now = time.time()
+        while self.heap and self.heap[0][0] <= now:
+            due, _, key, title = heapq.heappop(self.heap)
+            if not self._claim(key, due):
+                continue
+            try:
+                self.on_fire(key, title)
+            except Exception:
+                pass
+        self._arm()
+
+
+class ThemeRegistry:
+    """Remembers which theme role each colour option of a widget uses.
+
+    Applying a theme is then a single configure pass over the live widgets; entries
+    for widgets that have since been destroyed are dropped along the way.
+    """
+
+    def __init__(self):
+        self._entries = []   # (widget, {option: role})
+
+    def register(self, widget, roles):
+        if roles:
+            self._entries.append((widget, roles))
+        return widget
+
+    def apply(self, theme):
+        live = []
+        for widget, roles in self._entries:
+            try:
+                widget.configure(**{option: theme[role] for option, role in roles.items()})
+            except (tk.TclError, KeyError):
+                continue
+            live.append((widget, roles))
+        self._entries = live
+
+
 class MemoraLite:
+    # widget options that may name a theme role instead of a colour
+    THEMED_OPTIONS = ('bg', 'fg', 'activebackground', 'activeforeground', 'selectcolor', 'highlightbackground')
+    # methods wrapped with timing hooks while diagnostics are enabled
+    INSTRUMENTED = ('speak', '_speak', 'save_item', 'view_items', 'search_items', 'open_category', 'setup_ui',
+                    'switch_theme')
+    # spoken when a page is shown; prewarmed into the speech cache at startup
+    PAGE_ANNOUNCEMENTS = {
+        'home': 'Welcome to Memora. Press Begin Your Journey to continue.',
+        'menu': 'Main menu. Options are Reminders, Notes, Contacts and Journal. Use the buttons to open a section. There is also a Theme button to change the appearance.',
+        'content': 'Content page. You can save entries, view recent items, or search.',
+    }
+
     def __init__(self):
         # Initialize
+        self._started = time.perf_counter()
+        self.startup_timings = {}
         self.root = tk.Tk()
         self.root.title("MEMORA - Smart Memory Assistant")
         self.root.geometry("800x700")
@@ -40,9 +549,38 @@ class MemoraLite:
             settings_dir = os.path.dirname(os.path.abspath(__file__))
 
         self.settings_path = os.path.join(settings_dir, 'memora_settings.json')
+        self.startup_report_path = os.path.join(settings_dir, 'memora_startup.json')
+        # Widgets and the theme roles of their colours, restyled in place by set_theme
+        self.theme_registry = ThemeRegistry()
         self.current_theme_key = 'violet'
         # Voice enabled default
         self.voice_enabled = True
+        # Storage backend for category data ('csv', 'sqlite' or 'segmented' monthly files)
+        self.storage_kind = 'csv'
+        # Lazy start: show the home page first, start TTS and build other pages afterwards
+        self.lazy_start = True
+        # Durability of CSV appends: 'always', 'interval' or 'idle' fsync, see WriteBehindWriter
+        self.fsync_policy = 'interval'
+        self.fsync_ms = 1000
+        # CSV search engine: 'index' (trigram index) or 'scan' (memory-mapped scan, optionally in worker processes)
+        self.csv_search = 'index'
+        self.scan_workers = 1
+        # Segmented storage: compress month files older than this many months ('gz', 'xz' or None)
+        self.compress_segments = None
+        self.compress_after_months = 3
+        # Timing hooks and event-loop lag monitor (see the Diagnostics window)
+        self.diagnostics = False
+        # How often to pick up entries other Memora instances saved to the same files (0 = never)
+        self.watch_ms = 2000
+        # Repeated phrases are rendered to audio once and played back from this folder
+        self.speech_cache = True
+        self.speech_cache_mb = 20
+        # 'pyttsx3', or 'fake' to exercise speech and its cache without a TTS driver or sound card
+        self.speech_engine = 'pyttsx3'
+        self._watch_after = None
+        # live search; the content page is built lazily, but other instances' changes may arrive first
+        self._live_category = None
+        self._live_after = None
         # Load persisted settings (if any) and apply theme & voice setting
         self.load_settings()
         # Tk variable for the voice toggle (used in the menu)
@@ -52,31 +590,139 @@ class MemoraLite:
             # fallback if tk not fully initialized
             self.voice_var = None
         self.root.configure(bg=self.theme['bg'])
+        self.theme_registry.register(self.root, {'bg': 'bg'})
+        self.instruments = Instruments()
+        self.lag_monitor = LagMonitor(self.root, self.instruments)
 
-        # Text-to-speech
-        self.voice = pyttsx3.init()
-        self.voice.setProperty("rate", 165)
+        # Text-to-speech: a single worker thread owns the engine; in lazy mode it starts after first paint
+        if self.speech_engine == 'fake':
+            engine_factory, player = FakeTtsEngine, RecordingPlayer()
+        else:
+            engine_factory, player = create_tts_engine, WavPlayer()
+        cache = SpeechCache('speech_cache', self.speech_cache_mb << 20) if self.speech_cache else None
+        self.speech = SpeechWorker(engine_factory, rate=165, autostart=not self.lazy_start,
+                                   instruments=self.instruments, cache=cache, player=player)
         
+        # Category records (validation, storage, search); flushed and closed by on_close
+        try:
+            self.core = MemoraCore(storage_kind=self.storage_kind, fsync=self.fsync_policy, fsync_ms=self.fsync_ms,
+                                   search=self.csv_search, scan_workers=self.scan_workers)
+        except StorageUnavailable as e:
+            messagebox.showerror('Storage', f'{e}\n\nMemora Lite will close; check the storage setting '
+                                            f'in {self.settings_path} and the data folder.')
+            self.speech.stop()
+            self.root.destroy()
+            raise
+        # Reads and searches run off the Tk thread
+        self.jobs = JobExecutor(self.root, on_busy=self._set_busy, instruments=self.instruments)
+        # Live search: per-category record caches, loaded on first use and kept current by save_item
+        self._record_caches = {}
+        self._cache_generation = {}
+        self._cache_loading = set()
+        # Saved reminders are loaded after first paint and fired by a single timer
+        self.reminders = ReminderScheduler(self.root, 'reminders_state.log', on_fire=self._on_reminder)
+        self.root.protocol('WM_DELETE_WINDOW', self.on_close)
+
         # Create frames
         self.frames = {}
         for page in ["home", "menu", "content"]:
-            self.frames[page] = tk.Frame(self.root, bg=self.theme['bg'])
+            self.frames[page] = self.themed(tk.Frame, self.root, bg='bg')
         
+        if self.diagnostics:
+            self.set_diagnostics(True)
         self.setup_ui()
         self.show_frame("home")
-        self.voice.say("Welcome to Memora Lite")
+        self.speak("Welcome to Memora Lite", kind='welcome')
+        self._mark_startup('ui_built')
+        self.root.after_idle(self._on_first_frame)
     
+    def on_close(self):
+        """WM_DELETE_WINDOW hook: flush pending writes and stop the speech worker before exiting."""
+        try:
+            if self._watch_after is not None:
+                self.root.after_cancel(self._watch_after)
+            self.reminders.stop()
+            self.lag_monitor.stop()
+            self.jobs.shutdown()
+        except Exception:
+            pass
+        try:
+            self.core.close()
+        except Exception:
+            pass
+        try:
+            self.speech.stop()
+        except Exception:
+            pass
+        self.root.destroy()
+
+    def _mark_startup(self, name):
+        self.startup_timings[name] = round((time.perf_counter() - self._started) * 1000, 1)
+
+    def _on_first_frame(self):
+        """Runs once the event loop is up: record first paint, then start deferred work."""
+        try:
+            self.root.update_idletasks()
+        except Exception:
+            pass
+        self._mark_startup('first_paint')
+        # the engine may take a while to load; utterances queued so far are buffered
+        self.speech.start()
+        # render the fixed announcements while the speech thread has nothing else to do
+        self.speech.prewarm(list(self.PAGE_ANNOUNCEMENTS.values())
+                            + [self._category_prompt(c) for c in ('Reminders', 'Notes', 'Contacts', 'Journal')]
+                            + ['Entry saved'])
+        if self.watch_ms:
+            # mark where the files end before anything is loaded from them
+            self.core.changes()
+            self._watch_after = self.root.after(self.watch_ms, self._watch_changes)
+        self._load_reminders()
+        # build (or load) the contact index now so duplicate checks on save are instant
+        self.jobs.submit('contacts:index', lambda job: self.core.contact_index())
+        # likewise the activity totals, which saves then keep current
+        self.jobs.submit('stats:load', lambda job: self.core.stats())
+        if self.compress_segments:
+            self.jobs.submit('segments:compress', lambda job: self.core.compress_old(
+                self.compress_segments, self.compress_after_months, cancelled=job.is_cancelled))
+        self.root.after_idle(self._on_interactive)
+
+    def _on_interactive(self):
+        self._mark_startup('interactive')
+        self.root.after(2000, self._write_startup_report)
+
+    def _write_startup_report(self):
+        """Persist time-to-first-paint and time-to-interactive, in ms since the app object was created."""
+        report = dict(self.startup_timings)
+        report['lazy_start'] = self.lazy_start
+        if self.speech.ready_at is not None:
+            report['tts_ready'] = round((self.speech.ready_at - self._started) * 1000, 1)
+        report['recorded'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        try:
+            with open(self.startup_report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        except Exception:
+            # non-fatal; ignore write errors
+            pass
+
+    def themed(self, widget_class, parent, **options):
+        """Create a widget whose colour options name theme roles (e.g. bg='card') and register it."""
+        roles = {k: v for k, v in options.items() if k in self.THEMED_OPTIONS and v in self.theme}
+        options.update({k: self.theme[role] for k, role in roles.items()})
+        return self.theme_registry.register(widget_class(parent, **options), roles)
+
     def create_button(self, parent, text, command, is_primary=True, width=None):
-        btn = tk.Button(parent, text=text, command=command,
-                       bg=self.theme['primary'] if is_primary else self.theme['secondary'],
-                       fg="white",
-                       font=("Helvetica", 11, "bold"),
-                       relief="flat",
-                       activebackground=self.theme['hover'],
-                       activeforeground="white",
-                       padx=20, pady=8)
+        btn = self.themed(tk.Button, parent, text=text, command=command,
+                          bg='primary' if is_primary else 'secondary',
+                          fg="white",
+                          font=("Helvetica", 11, "bold"),
+                          relief="flat",
+                          activebackground='hover',
+                          activeforeground="white",
+                          padx=20, pady=8)
         if width:
             btn.config(width=width)
+        # its label is spoken on hover, so have it rendered ahead of time
+        self.speech.prewarm([text])
         # announce option when hovered — debounce so rapid moves don't queue many speaks
         try:
             def on_enter(e, t=text, b=btn):
@@ -86,7 +732,7 @@ class MemoraLite:
                         b.after_cancel(b._speak_after)
                 except Exception:
                     pass
-                b._speak_after = b.after(300, lambda: self.speak(t))
+                b._speak_after = b.after(300, lambda: self.speak(t, kind='hover'))
 
             def on_leave(e, b=btn):
                 try:
@@ -102,26 +748,26 @@ class MemoraLite:
             pass
         return btn
 
-    def speak(self, text):
-        """Speak text in background thread to avoid blocking the UI."""
+    def speak(self, text, kind=None):
+        """Queue text on the speech worker; a newer utterance of the same kind replaces a pending one."""
         if not text or not getattr(self, 'voice_enabled', True):
             return
-        threading.Thread(target=self._speak, args=(text,), daemon=True).start()
+        self._speak(text, kind)
 
-    def _speak(self, text):
+    def _speak(self, text, kind=None):
+        # bypasses the voice setting; used for the "Voice disabled" confirmation
         try:
-            self.voice.say(text)
-            self.voice.runAndWait()
+            self.speech.say(text, kind=kind)
         except Exception:
             # ignore TTS errors
             pass
     
     def create_card(self, parent, gradient=False):
-        frame = tk.Frame(parent, bg=self.theme['card'],
-                        relief="groove", bd=1, padx=20, pady=15)
+        frame = self.themed(tk.Frame, parent, bg='card',
+                            relief="groove", bd=1, padx=20, pady=15)
         if gradient:
-            canvas = tk.Canvas(frame, height=4, width=200, 
-                             bg=self.theme['gradient1'], highlightthickness=0)
+            canvas = self.themed(tk.Canvas, frame, height=4, width=200, 
+                                 bg='gradient1', highlightthickness=0)
             canvas.pack(side="top", fill="x")
         frame.lift()
         return frame
@@ -136,6 +782,10 @@ class MemoraLite:
         }
         self.theme.update(presets.get(key, {}))
         self.current_theme_key = key
+        # restyle live widgets in one pass (no-op before the UI exists)
+        registry = getattr(self, 'theme_registry', None)
+        if registry is not None:
+            registry.apply(self.theme)
 
     def load_settings(self):
         """Load settings from JSON file and apply theme. If file missing, apply default."""
@@ -147,6 +797,19 @@ class MemoraLite:
                     self.set_theme(key)
                     # voice setting persisted
                     self.voice_enabled = data.get('voice', True)
+                    self.storage_kind = data.get('storage', 'csv')
+                    self.lazy_start = data.get('lazy_start', True)
+                    self.fsync_policy = data.get('fsync', 'interval')
+                    self.fsync_ms = data.get('fsync_ms', 1000)
+                    self.csv_search = data.get('csv_search', 'index')
+                    self.scan_workers = data.get('scan_workers', 1)
+                    self.diagnostics = data.get('diagnostics', False)
+                    self.compress_segments = data.get('compress_segments')
+                    self.compress_after_months = data.get('compress_after_months', 3)
+                    self.watch_ms = data.get('watch_ms', 2000)
+                    self.speech_cache = data.get('speech_cache', True)
+                    self.speech_cache_mb = data.get('speech_cache_mb', 20)
+                    self.speech_engine = data.get('speech_engine', 'pyttsx3')
                     return
         except Exception:
             pass
@@ -156,13 +819,148 @@ class MemoraLite:
     def save_settings(self):
         """Persist current settings (theme key) to disk."""
         try:
-            data = {'theme': self.current_theme_key, 'voice': self.voice_enabled}
-            with open(self.settings_path, 'w', encoding='utf-8') as f:
+            data = {'theme': self.current_theme_key, 'voice': self.voice_enabled, 'storage': self.storage_kind,
+                    'lazy_start': self.lazy_start, 'fsync': self.fsync_policy, 'fsync_ms': self.fsync_ms,
+                    'csv_search': self.csv_search, 'scan_workers': self.scan_workers,
+                    'diagnostics': self.diagnostics, 'compress_segments': self.compress_segments,
+                    'compress_after_months': self.compress_after_months, 'watch_ms': self.watch_ms,
+                    'speech_cache': self.speech_cache, 'speech_cache_mb': self.speech_cache_mb,
+                    'speech_engine': self.speech_engine}
+            # write a private temp file and rename it over the old one, so another instance
+            # reading the settings never sees a half-written file
+            tmp = f'{self.settings_path}.{os.getpid()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
                 json.dump(data, f)
+            os.replace(tmp, self.settings_path)
         except Exception:
             # non-fatal; ignore write errors
             pass
 
+    def set_diagnostics(self, enabled):
+        """Turn timing hooks and the lag monitor on or off; when off the methods are not wrapped at all."""
+        self.diagnostics = enabled
+        self.instruments.enabled = enabled
+        for name in self.INSTRUMENTED:
+            if enabled:
+                setattr(self, name, self.instruments.wrap(name, getattr(type(self), name).__get__(self)))
+            else:
+                self.__dict__.pop(name, None)
+        if enabled:
+            self.lag_monitor.start()
+        else:
+            self.lag_monitor.stop()
+
+    def diagnostics_report(self):
+        return {
+            'recorded': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'enabled': self.diagnostics,
+            'startup_ms': dict(self.startup_timings),
+            'histograms': self.instruments.snapshot(),
+        }
+
+    def open_diagnostics(self):
+        """Window with live timing histograms, event-loop lag and JSON export."""
+        win = tk.Toplevel(self.root)
+        win.title('Diagnostics')
+        win.transient(self.root)
+        win.configure(bg=self.theme['bg'])
+        self.theme_registry.register(win, {'bg': 'bg'})
+
+        top = self.themed(tk.Frame, win, bg='bg')
+        top.pack(fill='x', padx=10, pady=(10, 0))
+        enabled_var = tk.BooleanVar(value=self.diagnostics)
+
+        def toggle():
+            self.set_diagnostics(enabled_var.get())
+            self.save_settings()
+
+        self.themed(tk.Checkbutton, top, text='Collect timings', variable=enabled_var, command=toggle,
+                    bg='bg', fg='text', selectcolor='card').pack(side='left')
+        lag_label = self.themed(tk.Label, top, text='', bg='bg', fg='text')
+        lag_label.pack(side='right')
+
+        columns = ('name', 'count', 'mean', 'p50', 'p95', 'p99', 'max')
+        tree = ttk.Treeview(win, columns=columns, show='headings', height=12)
+        for col in columns:
+            tree.heading(col, text=col if col in ('name', 'count') else f'{col} ms')
+            tree.column(col, width=200 if col == 'name' else 70, anchor='w' if col == 'name' else 'e')
+        tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        def refresh():
+            if not win.winfo_exists():
+                return
+            tree.delete(*tree.get_children())
+            for name, h in self.instruments.snapshot().items():
+                tree.insert('', 'end', values=(name, h['count'], h['mean_ms'], h['p50_ms'], h['p95_ms'],
+                                               h['p99_ms'], h['max_ms']))
+            lag_label.config(text=f'Event-loop lag: {self.lag_monitor.last_lag_ms:.1f} ms' if self.diagnostics
+                             else 'Timing is off')
+            win.after(1000, refresh)
+
+        def export():
+            path = filedialog.asksaveasfilename(parent=win, defaultextension='.json',
+                                                initialfile='memora_diagnostics.json',
+                                                filetypes=[('JSON', '*.json')])
+            if not path:
+                return
+            try:
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(self.diagnostics_report(), f, indent=2)
+            except Exception as e:
+                messagebox.showerror('Error', f'Could not export: {e}', parent=win)
+
+        nav = self.themed(tk.Frame, win, bg='bg')
+        nav.pack(fill='x', padx=10, pady=(0, 10))
+        self.create_button(nav, 'Reset', self.instruments.reset, is_primary=False).pack(side='left', padx=6)
+        self.create_button(nav, 'Export JSON…', export, is_primary=False).pack(side='left', padx=6)
+        self.create_button(nav, 'Close', win.destroy).pack(side='right', padx=6)
+        refresh()
+
+    def open_stats(self):
+        """Activity summary; reads only the precomputed totals (the first use may have to count them)."""
+        self.jobs.submit('stats:summary', lambda job: self.core.stats_summary(),
+                         on_done=self._show_stats,
+                         on_error=lambda e: messagebox.showerror('Error', f'Could not read statistics: {e}'))
+
+    def _show_stats(self, summary):
+        win = tk.Toplevel(self.root)
+        win.title('Stats')
+        win.transient(self.root)
+        win.configure(bg=self.theme['bg'])
+        self.theme_registry.register(win, {'bg': 'bg'})
+        categories = ('reminders', 'notes', 'journal')
+        totals = summary['totals']
+        self.themed(tk.Label, win, bg='bg', fg='text', justify='left',
+                    text='Saved so far: ' + ', '.join(f'{n} {key}' for key, n in totals.items())
+                    ).pack(anchor='w', padx=10, pady=(10, 0))
+
+        for title, rows in (('Last 7 days', summary['days']), ('Weeks starting', summary['weeks'])):
+            columns = ('period',) + categories
+            tree = ttk.Treeview(win, columns=columns, show='headings', height=len(rows))
+            for col in columns:
+                tree.heading(col, text=title if col == 'period' else col.title())
+                tree.column(col, width=120 if col == 'period' else 90, anchor='w' if col == 'period' else 'e')
+            for period, counts in reversed(rows):
+                tree.insert('', 'end', values=(period,) + tuple(counts[key] for key in categories))
+            tree.pack(fill='x', padx=10, pady=(10, 0))
+
+        def top(moods, count=5):
+            return ', '.join(f'{mood} ({n})' for mood, n in moods[:count]) or '—'
+
+        moods = summary['moods']
+        self.themed(tk.Label, win, bg='bg', fg='text', justify='left',
+                    text=f"Moods in the last 7 days: {top(moods['recent'])}\n"
+                         f"Moods over {len(summary['weeks'])} weeks: {top(moods['weeks'])}\n"
+                         f"Moods ever: {top(moods['all'])}").pack(anchor='w', padx=10, pady=(10, 0))
+
+        hours = summary['hours']
+        busiest = max(hours) or 1
+        load = '\n'.join(f'{hour:02d}:00  {"█" * round(20 * n / busiest)} {n}'
+                          for hour, n in enumerate(hours) if n)
+        self.themed(tk.Label, win, bg='bg', fg='text', justify='left', font=('Courier', 9),
+                    text='Reminders by hour\n' + (load or 'No reminders yet')).pack(anchor='w', padx=10, pady=(10, 0))
+        self.create_button(win, 'Close', win.destroy, is_primary=True).pack(pady=10)
+
     def open_theme_picker(self):
         """Open a small Toplevel theme picker with preset buttons."""
         presets = {
@@ -187,13 +985,13 @@ class MemoraLite:
             b.pack(side='left', expand=True, fill='x', padx=6)
             # speak theme name when hovered
             try:
-                b.bind('<Enter>', lambda e, t=label: self.speak(t))
+                b.bind('<Enter>', lambda e, t=label: self.speak(t, kind='hover'))
             except Exception:
                 pass
 
         # announce available themes
         try:
-            self.speak('Theme picker. Available themes: Violet, Teal, Sunset, and Forest. Click a button to apply.')
+            self.speak('Theme picker. Available themes: Violet, Teal, Sunset, and Forest. Click a button to apply.', kind='page')
         except Exception:
             pass
 
@@ -213,36 +1011,16 @@ class MemoraLite:
         return map_presets.get(key, {}).get(field, self.theme['primary'])
 
     def switch_theme(self, key):
-        """Change preset, rebuild frames and reapply UI so theme updates immediately."""
-        # update theme values
+        """Change preset and restyle the live widgets in place; the current page and forms are kept."""
         self.set_theme(key)
-        # destroy existing frames
-        for f in list(self.frames.values()):
-            try:
-                f.destroy()
-            except Exception:
-                pass
-        # recreate frames
-        self.frames = {}
-        for page in ["home", "menu", "content"]:
-            self.frames[page] = tk.Frame(self.root, bg=self.theme['bg'])
-        # rebuild UI
-        self.setup_ui()
-        # show menu so user can continue
-        self.show_frame('menu')
-        # persist theme choice
+        # persist theme (and voice) choice
         try:
             self.save_settings()
         except Exception:
             pass
         # announce new theme
         try:
-            self.speak(f"Theme switched to {key}")
-        except Exception:
-            pass
-        # Save voice setting as well
-        try:
-            self.save_settings()
+            self.speak(f"Theme switched to {key}", kind='feedback')
         except Exception:
             pass
 
@@ -255,10 +1033,11 @@ class MemoraLite:
                 self.voice_enabled = not getattr(self, 'voice_enabled', True)
             self.save_settings()
             if self.voice_enabled:
-                self.speak('Voice enabled')
+                self.speak('Voice enabled', kind='feedback')
             else:
-                # speak using direct thread to ensure the disabled state doesn't stop announcement
-                threading.Thread(target=lambda: self._speak('Voice disabled'), daemon=True).start()
+                # bypass the voice check so the disabled state doesn't stop the announcement
+                self.speech.cancel()
+                self._speak('Voice disabled', kind='feedback')
         except Exception:
             pass
     
@@ -267,53 +1046,71 @@ class MemoraLite:
         return
     
     def show_frame(self, name):
+        self._ensure_page(name)
         for frame in self.frames.values():
             frame.pack_forget()
         self.frames[name].pack(fill="both", expand=True, padx=20, pady=20)
-        # Announce the page and its options
+        # Announce the page and its options; whatever was pending belongs to the old page
         try:
+            self.speech.cancel(('hover', 'page'))
             self.announce_page(name)
         except Exception:
             pass
 
     def announce_page(self, name):
         """Speak a short summary of the page and available options."""
-        if name == 'home':
-            self.speak('Welcome to Memora. Press Begin Your Journey to continue.')
-        elif name == 'menu':
-            self.speak('Main menu. Options are Reminders, Notes, Contacts and Journal. Use the buttons to open a section. There is also a Theme button to change the appearance.')
-        elif name == 'content':
-            # when content page is shown the open_category call already sets a header; give a generic hint
-            self.speak('Content page. You can save entries, view recent items, or search.')
+        # on the content page open_category follows up with the category's own options
+        text = self.PAGE_ANNOUNCEMENTS.get(name)
+        if text:
+            self.speak(text, kind='page')
+
+    @staticmethod
+    def _category_prompt(category):
+        return f"{category} options: Save Entry, View Recent, and Search."
     
     def setup_ui(self):
         # Add floating stickers to all pages
         for frame in self.frames.values():
             self.add_floating_stickers(frame)
 
+        # Pages are built once; with lazy start the menu and content pages wait until first shown
+        self._built_pages = set()
+        self._ensure_page('home')
+        if not self.lazy_start:
+            self._ensure_page('menu')
+            self._ensure_page('content')
+
+    def _ensure_page(self, name):
+        """Build a page's widgets the first time it is needed."""
+        if name in self._built_pages:
+            return
+        self._built_pages.add(name)
+        getattr(self, f'_build_{name}_page')()
+
+    def _build_home_page(self):
         # Home Page
         title_frame = self.create_card(self.frames["home"], gradient=True)
         title_frame.pack(pady=50, padx=30, ipady=20)
         
         # Decorative header (no emojis)
-        header_frame = tk.Frame(title_frame, bg=self.theme['card'])
+        header_frame = self.themed(tk.Frame, title_frame, bg='card')
         header_frame.pack(fill="x", pady=(0,20))
-        tk.Label(header_frame, text=' ', bg=self.theme['card']).pack(side='left', padx=20)
+        self.themed(tk.Label, header_frame, text=' ', bg='card').pack(side='left', padx=20)
 
-        tk.Label(title_frame, 
+        self.themed(tk.Label, title_frame, 
                 text="MEMORA",
                 font=("Helvetica", 48, "bold"),
-                bg=self.theme['card'],
-                fg=self.theme['primary']).pack(pady=(0,5))
+                bg='card',
+                fg='primary').pack(pady=(0,5))
 
-        tk.Label(title_frame,
+        self.themed(tk.Label, title_frame,
                 text="Your Intelligent Memory Companion",
                 font=("Helvetica", 16),
-                bg=self.theme['card'],
-                fg=self.theme['text']).pack(pady=(0,30))
+                bg='card',
+                fg='text').pack(pady=(0,30))
 
         # Feature highlights
-        features_frame = tk.Frame(title_frame, bg=self.theme['card'])
+        features_frame = self.themed(tk.Frame, title_frame, bg='card')
         features_frame.pack(fill="x", pady=(0,30))
 
         features = [
@@ -323,46 +1120,49 @@ class MemoraLite:
         ]
 
         for title, text in features:
-            feature_card = tk.Frame(features_frame, bg=self.theme['card'])
+            feature_card = self.themed(tk.Frame, features_frame, bg='card')
             feature_card.pack(side="left", expand=True, padx=10)
-            tk.Label(feature_card, text=title,
+            self.themed(tk.Label, feature_card, text=title,
                     font=("Arial", 14, "bold"),
-                    bg=self.theme['card']).pack()
-            tk.Label(feature_card, text=text,
+                    bg='card').pack()
+            self.themed(tk.Label, feature_card, text=text,
                     font=("Helvetica", 10),
-                    bg=self.theme['card'],
-                    fg=self.theme['text']).pack()
+                    bg='card',
+                    fg='text').pack()
         
         # Start button with animation effect
-        btn_frame = tk.Frame(title_frame, bg=self.theme['card'])
+        btn_frame = self.themed(tk.Frame, title_frame, bg='card')
         btn_frame.pack(pady=20)
         
         start_btn = self.create_button(btn_frame, "Begin Your Journey →", 
                                      lambda: self.show_frame("menu"))
         start_btn.pack()
-        
+
+    def _build_menu_page(self):
         # Menu Page (themed buttons)
-        menu_header = tk.Frame(self.frames["menu"], bg=self.theme['bg'])
+        menu_header = self.themed(tk.Frame, self.frames["menu"], bg='bg')
         menu_header.pack(fill='x', pady=(10,0), padx=20)
 
-        tk.Label(menu_header, text="Choose Category", font=("Helvetica", 18, "bold"), bg=self.theme['bg'], fg=self.theme['text']).pack(side='left')
+        self.themed(tk.Label, menu_header, text="Choose Category", font=("Helvetica", 18, "bold"), bg='bg', fg='text').pack(side='left')
         # Theme button on the right of the menu header
         theme_btn = self.create_button(menu_header, "Theme", lambda: self.open_theme_picker(), is_primary=False, width=10)
         theme_btn.pack(side='right')
+        self.create_button(menu_header, "Diagnostics", self.open_diagnostics, is_primary=False,
+                           width=10).pack(side='right', padx=(0, 6))
 
         # Voice toggle (persistent)
         try:
             if hasattr(self, 'voice_var') and self.voice_var is not None:
-                voice_chk = tk.Checkbutton(menu_header, text='Voice', variable=self.voice_var,
-                                           command=self.toggle_voice, bg=self.theme['bg'], fg=self.theme['text'], selectcolor=self.theme['card'])
+                voice_chk = self.themed(tk.Checkbutton, menu_header, text='Voice', variable=self.voice_var,
+                                        command=self.toggle_voice, bg='bg', fg='text', selectcolor='card')
             else:
                 # fallback: disabled checkbox
-                voice_chk = tk.Checkbutton(menu_header, text='Voice', state='disabled', bg=self.theme['bg'], fg=self.theme['text'])
+                voice_chk = self.themed(tk.Checkbutton, menu_header, text='Voice', state='disabled', bg='bg', fg='text')
             voice_chk.pack(side='right', padx=(6, 12))
         except Exception:
             pass
 
-        menu_container = tk.Frame(self.frames["menu"], bg=self.theme['bg'])
+        menu_container = self.themed(tk.Frame, self.frames["menu"], bg='bg')
         menu_container.pack(pady=20)
         categories = ["Reminders", "Notes", "Contacts", "Journal"]
         for cat in categories:
@@ -372,68 +1172,114 @@ class MemoraLite:
         # Back button (secondary)
         back_btn = self.create_button(self.frames["menu"], "← Back to Home", lambda: self.show_frame("home"), is_primary=False)
         back_btn.pack(side="bottom", pady=20)
-        
+
+    def _build_content_page(self):
         # Content Page (will show forms & actions)
-        self.content_label = tk.Label(self.frames["content"],
-                                    font=("Helvetica", 20, "bold"),
-                                    bg=self.theme['bg'],
-                                    fg=self.theme['primary'])
+        self.content_label = self.themed(tk.Label, self.frames["content"],
+                                         font=("Helvetica", 20, "bold"),
+                                         bg='bg',
+                                         fg='primary')
         self.content_label.pack(pady=20)
         
-        self.content_buttons = tk.Frame(self.frames["content"], bg=self.theme['bg'])
+        self.content_buttons = self.themed(tk.Frame, self.frames["content"], bg='bg')
         self.content_buttons.pack(pady=20)
-        
+        # Progress indicator for background reads/searches; packed only while busy
+        self.busy_frame = self.themed(tk.Frame, self.frames["content"], bg='bg')
+        self.busy_label = self.themed(tk.Label, self.busy_frame, text='Working…', bg='bg', fg='text')
+        self.busy_label.pack(side='left', padx=(0, 8))
+        self.progress = ttk.Progressbar(self.busy_frame, mode='indeterminate', length=180)
+        self.progress.pack(side='left')
+        # Entry forms are cached per category; theme changes restyle them in place
+        self._forms = {}
+        self._current_form = None
+
         # Back button (secondary)
         back_content = self.create_button(self.frames["content"], "← Back to Menu", lambda: self.show_frame("menu"), is_primary=False)
         back_content.pack(side="bottom", pady=20)
+
+        # Live search over the current category
+        self.live_frame = self.themed(tk.Frame, self.frames["content"], bg='bg')
+        self.live_frame.pack(fill='both', expand=True, padx=30)
+        live_row = self.themed(tk.Frame, self.live_frame, bg='bg')
+        live_row.pack(fill='x')
+        self.themed(tk.Label, live_row, text='Live search', bg='bg', fg='text').pack(side='left')
+        self.live_var = tk.StringVar()
+        live_entry = tk.Entry(live_row, textvariable=self.live_var, width=40)
+        live_entry.pack(side='left', padx=8)
+        self.live_count = self.themed(tk.Label, live_row, text='', bg='bg', fg='text')
+        self.live_count.pack(side='left')
+        self.create_button(live_row, 'Stats', self.open_stats, is_primary=False).pack(side='right')
+        self.live_results = VirtualResults(self.live_frame, height=6)
+        self.live_results.frame.pack(fill='both', expand=True, pady=(6, 0))
+        self.live_var.trace_add('write', lambda *a: self._schedule_live_search())
     
     def open_category(self, category):
+        self._ensure_page('content')
         # Update header
         self.content_label.config(text=f"{category} — Quick Entry")
 
-        # Clear existing content
-        for widget in self.content_buttons.winfo_children():
-            widget.destroy()
+        # Swap in the cached form for this category; hidden forms keep their draft text
+        if self._current_form is not None:
+            self._current_form['frame'].pack_forget()
+        form = self._forms.get(category)
+        if form is None:
+            form = self._forms[category] = self._build_form(category)
+        form['frame'].pack(fill='x')
+        self._current_form = form
+        self._live_category = category
+        self._schedule_live_search()
+
+        self.show_frame('content')
+
+        # announce available actions for this category; replaces the generic content hint
+        try:
+            self.speak(self._category_prompt(category), kind='page')
+        except Exception:
+            pass
+
+    def _build_form(self, category):
+        """Build the entry form and action buttons for a category (once per content page)."""
+        container = self.themed(tk.Frame, self.content_buttons, bg='bg')
 
         # Create form area
-        form = tk.Frame(self.content_buttons, bg=self.theme['card'], bd=1, relief='flat', padx=12, pady=12)
+        form = self.themed(tk.Frame, container, bg='card', bd=1, relief='flat', padx=12, pady=12)
         form.pack(fill='x', padx=10, pady=10)
 
         entries = {}
         if category == 'Reminders':
-            tk.Label(form, text='Title', bg=self.theme['card'], fg=self.theme['text']).pack(anchor='w')
+            self.themed(tk.Label, form, text='Title', bg='card', fg='text').pack(anchor='w')
             entries['title'] = tk.Entry(form, width=40)
             entries['title'].pack(pady=4)
-            tk.Label(form, text='Time (HH:MM)', bg=self.theme['card'], fg=self.theme['text']).pack(anchor='w')
+            self.themed(tk.Label, form, text='Time (HH:MM)', bg='card', fg='text').pack(anchor='w')
             entries['time'] = tk.Entry(form, width=20)
             entries['time'].pack(pady=4)
 
         elif category == 'Notes':
-            tk.Label(form, text='Title', bg=self.theme['card'], fg=self.theme['text']).pack(anchor='w')
+            self.themed(tk.Label, form, text='Title', bg='card', fg='text').pack(anchor='w')
             entries['title'] = tk.Entry(form, width=40)
             entries['title'].pack(pady=4)
-            tk.Label(form, text='Content', bg=self.theme['card'], fg=self.theme['text']).pack(anchor='w')
+            self.themed(tk.Label, form, text='Content', bg='card', fg='text').pack(anchor='w')
             entries['content'] = tk.Text(form, width=60, height=6)
             entries['content'].pack(pady=4)
 
         elif category == 'Contacts':
-            tk.Label(form, text='Name', bg=self.theme['card'], fg=self.theme['text']).pack(anchor='w')
+            self.themed(tk.Label, form, text='Name', bg='card', fg='text').pack(anchor='w')
             entries['name'] = tk.Entry(form, width=40)
             entries['name'].pack(pady=4)
-            tk.Label(form, text='Phone', bg=self.theme['card'], fg=self.theme['text']).pack(anchor='w')
+            self.themed(tk.Label, form, text='Phone', bg='card', fg='text').pack(anchor='w')
             entries['phone'] = tk.Entry(form, width=30)
             entries['phone'].pack(pady=4)
 
         elif category == 'Journal':
-            tk.Label(form, text='Mood (one word)', bg=self.theme['card'], fg=self.theme['text']).pack(anchor='w')
+            self.themed(tk.Label, form, text='Mood (one word)', bg='card', fg='text').pack(anchor='w')
             entries['mood'] = tk.Entry(form, width=30)
             entries['mood'].pack(pady=4)
-            tk.Label(form, text='Notes', bg=self.theme['card'], fg=self.theme['text']).pack(anchor='w')
+            self.themed(tk.Label, form, text='Notes', bg='card', fg='text').pack(anchor='w')
             entries['notes'] = tk.Text(form, width=60, height=6)
             entries['notes'].pack(pady=4)
 
         # Save and utility buttons
-        btn_row = tk.Frame(self.content_buttons, bg=self.theme['bg'])
+        btn_row = self.themed(tk.Frame, container, bg='bg')
         btn_row.pack(fill='x', padx=10, pady=(6,0))
 
         save_btn = self.create_button(btn_row, 'Save Entry', lambda e=entries, c=category: self.save_item_form(c, e), is_primary=True)
@@ -442,25 +1288,115 @@ class MemoraLite:
         view_btn = self.create_button(btn_row, 'View Recent', lambda c=category: self.view_items(c), is_primary=False)
         view_btn.pack(side='left', padx=6)
 
-        search_btn = self.create_button(btn_row, 'Search', lambda c=category: self.search_items(c), is_primary=False)
+        recent_var = None
+        if category in ('Notes', 'Journal'):
+            # dated categories: limit searches to recent entries, or list a date range
+            recent_var = tk.BooleanVar(value=False)
+            search_btn = self.create_button(btn_row, 'Search', lambda c=category, v=recent_var: self.search_items(
+                c, days=90 if v.get() else None), is_primary=False)
+        else:
+            search_btn = self.create_button(btn_row, 'Search', lambda c=category: self.search_items(c), is_primary=False)
         search_btn.pack(side='left', padx=6)
+        if recent_var is not None:
+            self.create_button(btn_row, 'Date Range', lambda c=category: self.view_range(c),
+                               is_primary=False).pack(side='left', padx=6)
+            self.themed(tk.Checkbutton, btn_row, text='Last 90 days', variable=recent_var,
+                        bg='bg', fg='text', selectcolor='card').pack(side='left', padx=6)
+        if category == 'Contacts':
+            self.create_button(btn_row, 'Clean Up Duplicates', self.dedupe_contacts,
+                               is_primary=False).pack(side='left', padx=6)
+
+        return {'frame': container, 'entries': entries}
 
-        # announce available actions for this category
+    def _clear_form(self, entries):
+        for widget in entries.values():
+            try:
+                if isinstance(widget, tk.Text):
+                    widget.delete('1.0', 'end')
+                else:
+                    widget.delete(0, 'end')
+            except Exception:
+                pass
+    
+    def _set_busy(self, count):
+        """Show or hide the content page progress indicator for `count` running jobs."""
+        if getattr(self, 'progress', None) is None:
+            return
         try:
-            self.speak(f"{category} options: Save Entry, View Recent, and Search.")
+            if count:
+                self.busy_label.config(text='Working…' if count == 1 else f'Working on {count} tasks…')
+                if not self.busy_frame.winfo_ismapped():
+                    self.busy_frame.pack(pady=(0, 10), after=self.content_buttons)
+                    self.progress.start(12)
+            else:
+                self.progress.stop()
+                self.busy_frame.pack_forget()
         except Exception:
             pass
 
-        self.show_frame('content')
-    
-    def view_items(self, category):
-        try:
-            with open(f"{category.lower()}.csv", 'r') as f:
-                data = list(csv.reader(f))[-5:]  # Show last 5 entries
-                text = "\n".join([" | ".join(row) for row in data])
-                messagebox.showinfo(category, text if data else "No entries found")
-        except FileNotFoundError:
+    def view_items(self, category, page_size=5):
+        """Show the most recent entries with Older/Newer paging; pages are read off the Tk thread."""
+        self.jobs.submit(f'view:{category}',
+                         lambda job: self.core.recent(category, count=page_size),
+                         on_done=lambda result: self._show_recent(category, result, page_size),
+                         on_error=lambda e: messagebox.showerror('Error', f'Could not read entries: {e}'))
+
+    def _show_recent(self, category, result, page_size):
+        rows, older, newer = result
+        if not rows:
             messagebox.showinfo(category, "No entries found")
+            return
+
+        win = tk.Toplevel(self.root)
+        win.title(f"{category} — Recent")
+        win.transient(self.root)
+        win.configure(bg=self.theme['bg'])
+        self.theme_registry.register(win, {'bg': 'bg'})
+
+        text = self.themed(tk.Text, win, width=70, height=14, wrap='word', bg='card', fg='text')
+        text.pack(fill='both', expand=True, padx=10, pady=10)
+
+        nav = self.themed(tk.Frame, win, bg='bg')
+        nav.pack(fill='x', padx=10, pady=(0, 10))
+        # backend cursors around the page currently shown (None when there is nothing further)
+        page = {'older': older, 'newer': newer}
+
+        def render(rows):
+            text.config(state='normal')
+            text.delete('1.0', 'end')
+            text.insert('1.0', "\n".join([" | ".join(row) for row in rows]))
+            text.config(state='disabled')
+            older_btn.config(state='normal' if page['older'] is not None else 'disabled')
+            newer_btn.config(state='normal' if page['newer'] is not None else 'disabled')
+
+        def load(result):
+            rows, page['older'], page['newer'] = result
+            if win.winfo_exists():
+                render(rows)
+
+        def show_older():
+            if page['older'] is None:
+                return
+            cursor = page['older']
+            self.jobs.submit(f'page:{category}',
+                             lambda job: self.core.recent(category, count=page_size, before=cursor),
+                             on_done=load)
+
+        def show_newer():
+            if page['newer'] is None:
+                return
+            cursor = page['newer']
+            self.jobs.submit(f'page:{category}',
+                             lambda job: self.core.newer(category, cursor, count=page_size),
+                             on_done=load)
+
+        older_btn = self.create_button(nav, '← Older', show_older, is_primary=False)
+        older_btn.pack(side='left', padx=6)
+        newer_btn = self.create_button(nav, 'Newer →', show_newer, is_primary=False)
+        newer_btn.pack(side='left', padx=6)
+        self.create_button(nav, 'Close', win.destroy, is_primary=True).pack(side='right', padx=6)
+
+        render(rows)
     
     def add_item(self, category):
         if category == "Reminders":
@@ -486,70 +1422,465 @@ class MemoraLite:
                 self.save_item("journal.csv", [datetime.now(), mood])
     
     def save_item(self, filename, data):
-        with open(filename, 'a', newline='') as f:
-            csv.writer(f).writerow(data)
+        # filenames are kept for compatibility; the category is the file's stem
+        category = os.path.splitext(os.path.basename(filename))[0]
+        self.core.save(category, data)
+        self._cache_record(category, data)
         messagebox.showinfo("Success", "Entry saved!")
 
+    def _cache_record(self, category, row):
+        """Keep a loaded live-search cache current with a newly saved row."""
+        key = category.lower()
+        self._cache_generation[key] = self._cache_generation.get(key, 0) + 1
+        cache = self._record_caches.get(key)
+        if cache is not None:
+            cache.append(row)
+            self._schedule_live_search()
+
+    def _load_record_cache(self, category):
+        """Load a category's rows into a RecordCache in the background, then rerun the live search."""
+        key = category.lower()
+        if key in self._cache_loading:
+            return
+        self._cache_loading.add(key)
+        generation = self._cache_generation.get(key, 0)
+
+        def failed(e):
+            self._cache_loading.discard(key)
+            self.live_count.config(text='Could not load entries')
+
+        def done(cache):
+            self._cache_loading.discard(key)
+            if self._cache_generation.get(key, 0) != generation:
+                # rows were saved while loading; load again so none are missed or doubled
+                self._load_record_cache(category)
+                return
+            self._record_caches[key] = cache
+            self._schedule_live_search()
+
+        self.jobs.submit(f'cache:{key}', lambda job: self.core.record_cache(category),
+                         on_done=done, on_error=failed)
+
+    def _load_reminders(self):
+        """Read saved reminders in the background and hand the pending heap to the scheduler."""
+        generation = self._cache_generation.get('reminders', 0)
+
+        def done(loaded):
+            if self._cache_generation.get('reminders', 0) != generation:
+                # a reminder was saved while loading; load again so it is scheduled exactly once
+                self._load_reminders()
+                return
+            self.reminders.install(loaded)
+
+        self.jobs.submit('reminders:load', lambda job: self.reminders.load(self.core.iter_rows('reminders')),
+                         on_done=done)
+
+    def _watch_changes(self):
+        """Poll for entries saved by other instances; only the newly appended data is read."""
+        self._watch_after = None
+
+        def done(changes):
+            try:
+                self._apply_changes(changes)
+            finally:
+                # a failure here must not stop the watcher for the rest of the session
+                self._watch_after = self.root.after(self.watch_ms, self._watch_changes)
+
+        def failed(e):
+            self._watch_after = self.root.after(self.watch_ms, self._watch_changes)
+
+        self.jobs.submit('watch:changes', lambda job: self.core.changes(), on_done=done, on_error=failed)
+
+    def _apply_changes(self, changes):
+        """Fold rows from other instances into the live-search caches and the reminder schedule."""
+        for key, rows in changes.items():
+            if rows is None:
+                # rewritten elsewhere: drop what we hold and read it again on demand
+                self._record_caches.pop(key, None)
+                self._cache_generation[key] = self._cache_generation.get(key, 0) + 1
+                if key == 'reminders':
+                    self._load_reminders()
+                continue
+            for row in rows:
+                self._cache_record(key, row)
+                if key == 'reminders' and self.reminders.loaded and len(row) >= 3:
+                    self.reminders.add(*row[:3])
+        if changes and self._live_category is not None:
+            self._schedule_live_search()
+
+    def _on_reminder(self, key, title):
+        """Announce a due reminder and show a small notification with a snooze option."""
+        self.speak(f'Reminder: {title}', kind='alert')
+        try:
+            self.root.bell()
+        except Exception:
+            pass
+        win = tk.Toplevel(self.root)
+        win.title('Reminder')
+        win.attributes('-topmost', True)
+        win.configure(bg=self.theme['card'])
+        self.theme_registry.register(win, {'bg': 'card'})
+        self.themed(tk.Label, win, text=title, font=("Helvetica", 14, "bold"), bg='card', fg='text',
+                    wraplength=320).pack(padx=20, pady=(16, 8))
+        row = self.themed(tk.Frame, win, bg='card')
+        row.pack(pady=(0, 14))
+        self.create_button(row, 'Snooze 10 min', lambda: (self.reminders.snooze(key, title), win.destroy()),
+                           is_primary=False).pack(side='left', padx=6)
+        self.create_button(row, 'Dismiss', win.destroy).pack(side='left', padx=6)
+
+    def _schedule_live_search(self, delay=150):
+        """Debounce keystrokes: run the live search once typing pauses."""
+        if self._live_after is not None:
+            try:
+                self.root.after_cancel(self._live_after)
+            except Exception:
+                pass
+        self._live_after = self.root.after(delay, self._run_live_search)
+
+    def _run_live_search(self):
+        self._live_after = None
+        category = self._live_category
+        term = self.live_var.get().strip()
+        columns = CATEGORY_FIELDS.get(category.lower(), ()) if category else ()
+        if not category or not term:
+            self.live_results.set_source(None, columns)
+            self.live_count.config(text='')
+            return
+        cache = self._record_caches.get(category.lower())
+        if cache is None:
+            self.live_count.config(text='Loading…')
+            self._load_record_cache(category)
+            return
+        ids = cache.filter(term)
+        self.live_results.set_source(ListSource(cache.rows, ids), columns)
+        self.live_count.config(text=f'{len(ids)} matches')
+
     def save_item_form(self, category, entries):
-        """Collect values from the form widgets and save to the appropriate CSV."""
+        """Collect values from the form widgets, validate them in the core and save the entry."""
+        values = {}
+        for name, widget in entries.items():
+            values[name] = widget.get('1.0', 'end') if isinstance(widget, tk.Text) else widget.get()
         try:
-            if category == 'Reminders':
-                title = entries['title'].get().strip()
-                time = entries['time'].get().strip()
-                if not title or not time:
-                    messagebox.showwarning('Missing', 'Please enter title and time')
-                    return
-                self.save_item('reminders.csv', [datetime.now().strftime('%Y-%m-%d'), time, title])
+            row = self.core.build_row(category, values)
+        except InvalidEntry as e:
+            messagebox.showwarning(e.title, str(e))
+            return
+        if category == 'Contacts':
+            # the contact index may still be loading: check off the Tk thread, then save
+            def check(job):
+                return self.core.find_duplicate(row), self.core.same_number(row)
 
-            elif category == 'Notes':
-                title = entries['title'].get().strip()
-                content = entries['content'].get('1.0', 'end').strip()
-                if not title or not content:
-                    messagebox.showwarning('Missing', 'Please enter title and content')
+            def checked(found):
+                existing, others = found
+                if existing is not None:
+                    messagebox.showinfo('Already saved', f'{existing[0]} ({existing[1]}) is already in your contacts')
                     return
-                self.save_item('notes.csv', [datetime.now().strftime('%Y-%m-%d %H:%M'), title, content])
-
-            elif category == 'Contacts':
-                name = entries['name'].get().strip()
-                phone = entries['phone'].get().strip()
-                if not name or not phone:
-                    messagebox.showwarning('Missing', 'Please enter name and phone')
+                if others and not messagebox.askyesno(
+                        'Possible duplicate',
+                        f'This number is saved as {others[0][0]} ({others[0][1]}). Save anyway?'):
                     return
-                self.save_item('contacts.csv', [name, phone])
+                self._store_form(category, entries, row)
 
-            elif category == 'Journal':
-                mood = entries['mood'].get().strip()
-                notes = entries['notes'].get('1.0', 'end').strip()
-                if not mood:
-                    messagebox.showwarning('Missing', 'Please enter your mood')
-                    return
-                self.save_item('journal.csv', [datetime.now().strftime('%Y-%m-%d %H:%M'), mood, notes])
+            # a second click while the check runs replaces the first, so the entry is saved once
+            self.jobs.submit('contacts:check', check, on_done=checked,
+                             on_error=lambda e: self._store_form(category, entries, row))
+            return
+        self._store_form(category, entries, row)
+
+    def _store_form(self, category, entries, row):
+        try:
+            self.save_item(f'{category.lower()}.csv', row)
+            if category == 'Reminders' and self.reminders.loaded:
+                self.reminders.add(*row)
 
+            # the form is reused, so clear the saved draft
+            self._clear_form(entries)
             # Provide subtle voice feedback if available
-            try:
-                self.voice.say('Entry saved')
-                self.voice.runAndWait()
-            except Exception:
-                pass
+            self.speak('Entry saved', kind='feedback')
 
         except Exception as e:
             messagebox.showerror('Error', f'Could not save entry: {e}')
     
-    def search_items(self, category):
-        term = simpledialog.askstring("Search", "Enter search term:")
-        if term:
-            try:
-                with open(f"{category.lower()}.csv", 'r') as f:
-                    data = list(csv.reader(f))
-                    matches = [row for row in data if any(term.lower() in str(cell).lower() for cell in row)]
-                    text = "\n".join([" | ".join(row) for row in matches])
-                    messagebox.showinfo("Search Results", text if matches else "No matches found")
-            except FileNotFoundError:
-                messagebox.showinfo("Search", "No entries to search")
+    def search_items(self, category, days=None):
+        term = simpledialog.askstring("Search", "Enter search term:" if not days else f"Search the last {days} days for:")
+        if term and category == 'Contacts' and self._looks_like_phone(term):
+            # a full number is answered from the contact index, whatever notation it was saved in;
+            # part of a number falls through to the usual substring search
+            def find(job):
+                rows = self.core.lookup_phone(term)
+                return rows, None if rows else self.core.search(category, term, cancelled=job.is_cancelled)
+
+            def show(found):
+                rows, refs = found
+                if rows:
+                    self._show_rows(category, f'matches for "{term}"', rows)
+                else:
+                    self._show_search_results(category, term, refs)
+
+            self.jobs.submit('search:Contacts', find, on_done=show,
+                             on_error=lambda e: messagebox.showerror('Error', f'Search failed: {e}'))
+        elif term:
+            # a new search in this category cancels the one still running
+            self.jobs.submit(f'search:{category}',
+                             lambda job: self.core.search(category, term, cancelled=job.is_cancelled, days=days),
+                             on_done=lambda refs: self._show_search_results(category, term, refs),
+                             on_error=lambda e: messagebox.showerror('Error', f'Search failed: {e}'))
+
+    def view_range(self, category):
+        """List the entries dated between two days (inclusive); only the segments in range are read."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        first = simpledialog.askstring('Date Range', 'From date (YYYY-MM-DD):',
+                                       initialvalue=(datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d'))
+        if not first:
+            return
+        last = simpledialog.askstring('Date Range', 'To date (YYYY-MM-DD):', initialvalue=today)
+        if not last:
+            return
+        try:
+            since = datetime.strptime(first.strip(), '%Y-%m-%d')
+            until = datetime.strptime(last.strip(), '%Y-%m-%d') + timedelta(days=1)
+        except ValueError:
+            messagebox.showwarning('Invalid date', 'Please enter dates as YYYY-MM-DD')
+            return
+        title = f'{since:%Y-%m-%d} to {last.strip()}'
+        self.jobs.submit(f'range:{category}',
+                         lambda job: list(self.core.rows_between(category, since.strftime('%Y-%m-%d'),
+                                                                 until.strftime('%Y-%m-%d'))),
+                         on_done=lambda rows: self._show_rows(category, f'from {title}', rows),
+                         on_error=lambda e: messagebox.showerror('Error', f'Could not read entries: {e}'))
+
+    @staticmethod
+    def _looks_like_phone(term):
+        term = term.strip()
+        return sum(ch.isdigit() for ch in term) >= 7 and all(ch.isdigit() or ch in '+-(). ' for ch in term)
+
+    def dedupe_contacts(self):
+        """Merge duplicate contacts in the background, then refresh the live search."""
+        if not messagebox.askyesno('Clean Up Duplicates',
+                                   'Merge contacts that share a phone number (or a name without one)?'):
+            return
+
+        def done(removed):
+            self._record_caches.pop('contacts', None)
+            self._cache_generation['contacts'] = self._cache_generation.get('contacts', 0) + 1
+            self._schedule_live_search()
+            messagebox.showinfo('Clean Up Duplicates',
+                                f'Merged {removed} duplicate contacts' if removed else 'No duplicates found')
+
+        self.jobs.submit('dedupe:contacts', lambda job: self.core.dedupe_contacts(cancelled=job.is_cancelled),
+                         on_done=done,
+                         on_error=lambda e: messagebox.showerror('Error', f'Could not clean up contacts: {e}'))
+
+    def _show_rows(self, category, title, rows):
+        """Open a results window over rows already in memory."""
+        if not rows:
+            messagebox.showinfo(category, f'No entries {title}')
+            return
+        win = tk.Toplevel(self.root)
+        win.title(f"{category} — {title}")
+        win.transient(self.root)
+        win.configure(bg=self.theme['bg'])
+        self.theme_registry.register(win, {'bg': 'bg'})
+        self.themed(tk.Label, win, text=f'{len(rows)} entries {title}', bg='bg', fg='text').pack(anchor='w', padx=10, pady=(10, 0))
+        results = VirtualResults(win, CATEGORY_FIELDS.get(category.lower(), ()), height=15)
+        results.frame.pack(fill='both', expand=True, padx=10, pady=10)
+        results.set_source(ListSource(rows))
+        self.create_button(win, 'Close', win.destroy, is_primary=True).pack(pady=(0, 10))
+
+    def _show_search_results(self, category, term, refs):
+        """Open a scrollable results window; rows are read from storage only as they scroll into view."""
+        if not len(refs):
+            messagebox.showinfo("Search Results", "No matches found")
+            return
+        win = tk.Toplevel(self.root)
+        win.title(f"Search Results — {category}")
+        win.transient(self.root)
+        win.configure(bg=self.theme['bg'])
+        self.theme_registry.register(win, {'bg': 'bg'})
+        self.themed(tk.Label, win, text=f'{len(refs)} matches for "{term}"', bg='bg', fg='text').pack(anchor='w', padx=10, pady=(10, 0))
+        results = VirtualResults(win, CATEGORY_FIELDS.get(category.lower(), ()), height=15)
+        results.frame.pack(fill='both', expand=True, padx=10, pady=10)
+        results.set_source(RefSource(self.core, category, refs))
+        self.create_button(win, 'Close', win.destroy, is_primary=True).pack(pady=(0, 10))
     
     def run(self):
         self.root.mainloop()
 
+# --- Command line: bulk import/export without starting Tk ---
+
+# Imported rows may carry their own timestamp in these columns; anything else is stamped at import time
+IMPORT_TIMESTAMPS = {'reminders': ('date', '%Y-%m-%d'), 'notes': ('created', '%Y-%m-%d %H:%M'),
+                     'journal': ('created', '%Y-%m-%d %H:%M')}
+# stored column names that differ from the form field names build_row expects
+IMPORT_ALIASES = {'due_time': 'time'}
+
+
+def _file_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_records(f, fmt):
+    """Yield one dict per input record from a CSV file with a header row or a JSON-lines file.
+
+    A JSON line that does not parse is yielded as None so it is reported as invalid.
+    """
+    if fmt == 'jsonl':
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+    else:
+        yield from csv.DictReader(f)
+
+
+def validated_rows(core, category, records, problems, max_reported=20):
+    """Turn input records into stored rows with the same rules as the entry forms.
+
+    Invalid records are counted in problems['invalid'] (the first few are printed) and skipped.
+    """
+    stamp_field, stamp_format = IMPORT_TIMESTAMPS.get(category, (None, None))
+    for number, record in enumerate(records, 1):
+        try:
+            if not isinstance(record, dict):
+                raise InvalidEntry('Invalid record', 'not a JSON object')
+            values = {IMPORT_ALIASES.get(k, k): '' if v is None else str(v) for k, v in record.items() if k}
+            row = core.build_row(category, values)
+            stamp = values.get(stamp_field, '').strip() if stamp_field else ''
+            if stamp:
+                try:
+                    datetime.strptime(stamp, stamp_format)
+                except ValueError:
+                    raise InvalidEntry('Invalid date', f'{stamp_field} must look like {stamp_format}')
+                row[0] = stamp
+        except InvalidEntry as e:
+            problems['invalid'] += 1
+            if problems['invalid'] <= max_reported:
+                print(f'record {number}: skipped ({e})', file=sys.stderr)
+            continue
+        yield row
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _open_input(path):
+    if path == '-':
+        return sys.stdin
+    # utf-8-sig drops the byte order mark spreadsheet exports often start with
+    return open(path, 'r', newline='', encoding='utf-8-sig')
+
+
+def _open_output(path):
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', newline='', encoding='utf-8')
+
+
+def _report(verb, count, started, extra=''):
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(f'{verb} {count} rows in {elapsed:.2f}s ({count / elapsed:,.0f} rows/sec){extra}', file=sys.stderr)
+
+
+def cli_import(args):
+    core = MemoraCore(args.dir, storage_kind=args.storage, fsync='idle')
+    category = core.category_key(args.category)
+    problems = {'invalid': 0}
+    saved = duplicates = 0
+    started = last_report = time.perf_counter()
+    f = _open_input(args.file)
+    try:
+        rows = validated_rows(core, category, read_records(f, _file_format(args.file, args.format)), problems)
+        for batch in batched(rows, args.batch):
+            stored = core.save_many(category, batch)
+            # contacts already on file are skipped by the core
+            duplicates += len(batch) - stored
+            saved += stored
+            if args.progress and time.perf_counter() - last_report >= 5:
+                last_report = time.perf_counter()
+                _report('imported', saved, started)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+        core.close()
+    extra = f', skipped {problems["invalid"]} invalid'
+    if duplicates:
+        extra += f' and {duplicates} duplicate'
+    _report('imported', saved, started, extra)
+    return 1 if problems['invalid'] and not saved else 0
+
+
+def cli_export(args):
+    core = MemoraCore(args.dir, storage_kind=args.storage)
+    category = core.category_key(args.category)
+    fields = CATEGORY_FIELDS[category]
+    fmt = _file_format(args.file, args.format)
+    count = 0
+    started = time.perf_counter()
+    f = _open_output(args.file)
+    try:
+        if fmt == 'jsonl':
+            for row in core.iter_rows(category):
+                f.write(json.dumps(dict(zip(fields, row)), ensure_ascii=False) + '\n')
+                count += 1
+        else:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            for row in core.iter_rows(category):
+                writer.writerow(row)
+                count += 1
+    finally:
+        if f is not sys.stdout:
+            f.close()
+        core.close()
+    _report('exported', count, started)
+    return 0
+
+
+def main(argv=None):
+    """Start the app, or run `import` / `export` when given a command."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        try:
+            app = MemoraLite()
+        except StorageUnavailable:
+            return 1
+        app.run()
+        return 0
+    parser = argparse.ArgumentParser(prog='memora_lite', description='Bulk import and export of Memora Lite entries.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, handler, help_text in (('import', cli_import, 'append entries from a CSV or JSON-lines file'),
+                                     ('export', cli_export, 'write all entries of a category')):
+        cmd = commands.add_parser(name, help=help_text)
+        cmd.add_argument('category', choices=sorted(CATEGORY_FIELDS))
+        cmd.add_argument('file', help="input or output path, '-' for stdin/stdout")
+        cmd.add_argument('--format', choices=('csv', 'jsonl'), help='default: from the file extension')
+        cmd.add_argument('--dir', default='.', help='data directory (default: current directory)')
+        cmd.add_argument('--storage', default='csv', choices=sorted(STORAGE_BACKENDS),
+                         help="storage backend; use the same one as the app's settings")
+        cmd.set_defaults(handler=handler)
+    commands.choices['import'].add_argument('--batch', type=int, default=5000, help='rows per write')
+    commands.choices['import'].add_argument('--progress', action='store_true', help='report progress every 5s')
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except StorageUnavailable as e:
+        print(e, file=sys.stderr)
+        return 1
+
+
 if __name__ == "__main__":
-    app = MemoraLite()
-    app.run()
+    sys.exit(main())